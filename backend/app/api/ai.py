@@ -2,10 +2,12 @@
 AI chat and knowledge base API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from ..core.database import get_db
+from ..core.database import get_db, get_async_db
 from ..core.security import get_current_active_user, require_user_type
 from ..models.user import User, UserType
 from ..schemas.ai import (
@@ -20,29 +22,30 @@ from ..schemas.ai import (
     AIRatingUpdate,
 )
 from ..schemas.menu import DishResponse
-from ..services.ai_service import AIEngine
+from ..services import embeddings
+from ..services.ai_service import AIEngine, invalidate_kb_cache
 from ..crud.crud_ai_rating import create_rating, update_rating
 
 router = APIRouter()
 
 
 @router.post("/", response_model=AIRatingResponse)
-def create_ai_rating(
+async def create_ai_rating(
     rating_in: AIRatingCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new AI rating record."""
-    return create_rating(db, rating_in)
+    return await create_rating(db, rating_in)
 
 
 @router.put("/{rating_id}", response_model=AIRatingResponse)
-def update_ai_rating(
+async def update_ai_rating(
     rating_id: int,
     rating_in: AIRatingUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update an existing AI rating."""
-    updated = update_rating(db, rating_id, rating_in)
+    updated = await update_rating(db, rating_id, rating_in)
     if not updated:
         raise HTTPException(status_code=404, detail="Rating not found")
     return updated
@@ -73,20 +76,17 @@ async def ask_question(
     # Get or create session ID (simplified)
     session_id = request.headers.get("X-Session-ID", "anonymous")
     
-    # Ask question
+    # Ask question; a keyword miss falls through to the embedding model, which
+    # is CPU-bound, so keep the whole lookup off the event loop
     ai_engine = AIEngine(db)
-    answer, source, kb_id = ai_engine.answer_question(
+    answer, source, kb_id, chat_log_id = await run_in_threadpool(
+        ai_engine.answer_question,
         user_id=user_id,
         question_text=question_data.question,
         session_id=session_id,
         ip_address=client_ip
     )
     
-    # Get chat log ID (last inserted)
-    from ..models.ai import ChatLog
-    chat_log = db.query(ChatLog).order_by(ChatLog.id.desc()).first()
-    chat_log_id = chat_log.id if chat_log else 0
-    
     return QuestionResponse(
         question=question_data.question,
         answer=answer,
@@ -198,21 +198,23 @@ async def create_knowledge_entry(
     - **question**: The question
     - **answer**: The answer
     - **category**: Optional category
-    - **tags**: Optional comma-separated tags
+    - **tags**: Optional list of tags (a comma-separated string is also accepted)
     
     Adds new Q&A to the knowledge base for faster responses.
     """
-    from ..models.user import Manager
-    
-    manager = db.query(Manager).filter(Manager.user_id == current_user.id).first()
+    manager = current_user.manager
     manager_id = manager.id if manager else None
     
+    # Model inference is CPU-bound, so encode off the event loop
+    embedding = await run_in_threadpool(embeddings.encode, kb_data.question)
+    
     ai_engine = AIEngine(db)
     success, message, kb_id = ai_engine.add_knowledge_entry(
         question=kb_data.question,
         answer=kb_data.answer,
         category=kb_data.category,
         tags=kb_data.tags,
+        embedding=embedding,
         created_by=manager_id
     )
     
@@ -252,6 +254,8 @@ async def update_knowledge_entry(
         )
     
     # Update fields
+    if entry.question != kb_data.question:
+        entry.embedding = await run_in_threadpool(embeddings.encode, kb_data.question)
     entry.question = kb_data.question
     entry.answer = kb_data.answer
     if kb_data.category:
@@ -264,6 +268,7 @@ async def update_knowledge_entry(
     entry.flag_count = 0
     
     db.commit()
+    invalidate_kb_cache()
     db.refresh(entry)
     
     return entry
@@ -292,6 +297,7 @@ async def delete_knowledge_entry(
     
     db.delete(entry)
     db.commit()
+    invalidate_kb_cache()
     
     return {"success": True, "message": "Knowledge base entry deleted"}
 
@@ -2,15 +2,17 @@
 Authentication API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from datetime import timedelta
 
-from ..core.database import get_db
+from ..core.database import get_db, insert_or_ignore
 from ..core.config import settings
 from ..core.security import (
     verify_password,
+    password_needs_rehash,
     get_password_hash,
     create_access_token,
     get_current_active_user
@@ -70,7 +72,7 @@ async def register(
     user = User(
         email=request.email,
         username=request.username,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=await run_in_threadpool(get_password_hash, request.password),
         full_name=request.full_name,
         phone=request.phone,
         user_type=user_type_map[request.user_type],
@@ -87,8 +89,7 @@ async def register(
         db.add(customer)
         
         # Create wallet for customer
-        wallet = Wallet(user_id=user.id, balance=0.0)
-        db.add(wallet)
+        db.execute(insert_or_ignore(db.get_bind(), Wallet, ["user_id"], user_id=user.id, balance=0.0))
     
     elif user.user_type == UserType.CHEF:
         chef = Chef(user_id=user.id)
@@ -99,8 +100,7 @@ async def register(
         db.add(delivery_person)
     
     # Create reputation record
-    reputation = Reputation(user_id=user.id, score=0)
-    db.add(reputation)
+    db.execute(insert_or_ignore(db.get_bind(), Reputation, ["user_id"], user_id=user.id, score=0))
     
     db.commit()
     db.refresh(user)
@@ -129,7 +129,8 @@ async def login(
         )
     ).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Password hashing is deliberately slow; keep it off the event loop
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -171,6 +172,10 @@ async def login(
             detail="Account is suspended"
         )
     
+    # Upgrade legacy bcrypt hashes now that we have the plaintext
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await run_in_threadpool(get_password_hash, form_data.password)
+    
     # Reset failed login attempts on successful login
     user.failed_login_attempts = 0
     from datetime import datetime
@@ -180,7 +185,7 @@ async def login(
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id), "username": user.username, "user_type": user.user_type.value},
+        data={"sub": str(user.id), "username": user.username, "user_type": user.user_type},
         expires_delta=access_token_expires
     )
     
@@ -197,11 +202,11 @@ async def get_current_user_info(
     Requires valid JWT token.
     """
     # Create response object
-    response = UserResponse.from_orm(current_user)
+    response = UserResponse.model_validate(current_user)
     
     # Populate extra fields
     if current_user.user_type == UserType.CUSTOMER and current_user.customer:
-        response.is_vip = current_user.customer.is_vip
+        response = response.model_copy(update={"is_vip": current_user.customer.is_vip})
         
     return response
 
@@ -43,8 +43,8 @@ async def list_chef_orders(
         order_dict = {
             "id": order.id,
             "order_number": order.order_number,
-            "status": order.status.value,
-            "payment_status": order.payment_status.value,
+            "status": order.status,
+            "payment_status": order.payment_status,
             "subtotal": order.subtotal,
             "discount_amount": order.discount_amount,
             "delivery_fee": order.delivery_fee,
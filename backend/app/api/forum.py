@@ -2,7 +2,8 @@
 Forum API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List
 
 from ..core.database import get_db
@@ -58,24 +59,30 @@ async def list_topics(
     """
     List discussion topics.
     """
-    query = db.query(ForumTopic)
+    reply_counts = (
+        db.query(ForumPost.topic_id, func.count(ForumPost.id).label("reply_count"))
+        .group_by(ForumPost.topic_id)
+        .subquery()
+    )
+    query = (
+        db.query(ForumTopic, func.coalesce(reply_counts.c.reply_count, 0))
+        .outerjoin(reply_counts, reply_counts.c.topic_id == ForumTopic.id)
+        .options(joinedload(ForumTopic.author))
+    )
     
     if category:
         query = query.filter(ForumTopic.category == category)
     
-    topics = query.order_by(ForumTopic.created_at.desc()).offset(skip).limit(limit).all()
+    rows = query.order_by(ForumTopic.created_at.desc()).offset(skip).limit(limit).all()
     
     result = []
-    for t in topics:
-        # Count replies
-        reply_count = db.query(ForumPost).filter(ForumPost.topic_id == t.id).count()
-        
+    for t, reply_count in rows:
         result.append(ForumTopicResponse(
             id=t.id,
             title=t.title,
             content=t.content,
             author_id=t.author_id,
-            author_name=t.author.username, # Assuming author relationship is loaded or lazy loaded
+            author_name=t.author.username,
             category=t.category,
             view_count=t.view_count,
             created_at=t.created_at,
@@ -93,19 +100,31 @@ async def get_topic(
     """
     Get topic details and posts.
     """
-    topic = db.query(ForumTopic).filter(ForumTopic.id == topic_id).first()
-    if not topic:
+    # Increment view count
+    updated = db.execute(
+        update(ForumTopic)
+        .where(ForumTopic.id == topic_id)
+        .values(view_count=ForumTopic.view_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if updated.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Topic not found"
         )
-    
-    # Increment view count
-    topic.view_count += 1
     db.commit()
     
-    # Get posts
-    posts = db.query(ForumPost).filter(ForumPost.topic_id == topic_id).order_by(ForumPost.created_at.asc()).all()
+    # Topic, its author and all posts with their authors in two round trips
+    topic = (
+        db.query(ForumTopic)
+        .options(
+            joinedload(ForumTopic.author),
+            selectinload(ForumTopic.posts).joinedload(ForumPost.author)
+        )
+        .filter(ForumTopic.id == topic_id)
+        .one()
+    )
+    posts = topic.posts
     
     post_responses = [
         ForumPostResponse(
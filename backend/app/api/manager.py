@@ -2,15 +2,20 @@
 Manager-specific API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from typing import Iterator, List, Optional
 from pydantic import BaseModel
+import csv
+import io
 
-from ..core.database import get_db
+from ..core.database import get_db, insert_or_ignore
 from ..core.security import get_current_active_user, require_user_type, get_password_hash
 from ..models.user import User, UserType, UserStatus, Manager, Customer, Chef, DeliveryPerson
-from ..models.wallet import Wallet
+from ..models.wallet import Wallet, Transaction
 from ..models.reputation import Reputation, Complaint, Compliment, ComplaintStatus
+from ..schemas.base import ResponseModel
 from ..schemas.user import UserResponse
 
 router = APIRouter()
@@ -30,7 +35,7 @@ async def list_pending_registrations(
     """
     List all pending staff registrations (Manager only).
     """
-    users = db.query(User).filter(
+    users = db.query(User).options(raiseload("*")).filter(
         User.status == UserStatus.PENDING
     ).offset(skip).limit(limit).all()
     
@@ -141,7 +146,7 @@ async def kick_customer(
 class StaffUpdate(BaseModel):
     salary: Optional[float] = None
 
-class StaffResponse(BaseModel):
+class StaffResponse(ResponseModel):
     id: int
     username: str
     full_name: Optional[str]
@@ -150,9 +155,6 @@ class StaffResponse(BaseModel):
     status: str
     salary: float = 0.0
     rating: float = 0.0
-    
-    class Config:
-        from_attributes = True
 
 @router.get("/staff", response_model=List[StaffResponse])
 async def list_staff(
@@ -162,7 +164,11 @@ async def list_staff(
     """
     List all Chefs and Delivery Personnel.
     """
-    staff_users = db.query(User).filter(
+    staff_users = db.query(User).options(
+        selectinload(User.chef),
+        selectinload(User.delivery_person),
+        raiseload("*")
+    ).filter(
         User.user_type.in_([UserType.CHEF, UserType.DELIVERY]),
         User.status != UserStatus.DEACTIVATED # Show active and suspended, maybe pending too?
     ).all()
@@ -183,8 +189,8 @@ async def list_staff(
             username=u.username,
             full_name=u.full_name,
             email=u.email,
-            user_type=u.user_type.value,
-            status=u.status.value,
+            user_type=u.user_type,
+            status=u.status,
             salary=salary,
             rating=rating
         ))
@@ -253,7 +259,11 @@ async def list_complaints(
     """
     List all complaints.
     """
-    complaints = db.query(Complaint).order_by(Complaint.created_at.desc()).all()
+    complaints = db.query(Complaint).options(
+        joinedload(Complaint.complainant),
+        joinedload(Complaint.subject),
+        raiseload("*")
+    ).order_by(Complaint.created_at.desc()).all()
     
     results = []
     for c in complaints:
@@ -261,7 +271,7 @@ async def list_complaints(
             "id": c.id,
             "title": c.title,
             "description": c.description,
-            "status": c.status.value,
+            "status": c.status,
             "created_at": c.created_at,
             "complainant": c.complainant.username,
             "subject": c.subject.username,
@@ -269,6 +279,29 @@ async def list_complaints(
         })
     return results
 
+@router.get("/complaints/export")
+async def export_complaints(
+    current_user: User = Depends(require_user_type(UserType.MANAGER)),
+    db: Session = Depends(get_db)
+):
+    """
+    Export all complaints as CSV.
+    """
+    stmt = select(
+        Complaint.id,
+        Complaint.complainant_id,
+        Complaint.subject_id,
+        Complaint.order_id,
+        Complaint.title,
+        Complaint.status,
+        Complaint.weight,
+        Complaint.is_disputed,
+        Complaint.created_at,
+        Complaint.resolved_at
+    ).order_by(Complaint.created_at)
+    
+    return _csv_response(db, stmt, "complaints.csv")
+
 @router.put("/complaints/{complaint_id}/resolve", response_model=dict)
 async def resolve_complaint(
     complaint_id: int,
@@ -407,10 +440,69 @@ async def create_manager(
     manager = Manager(user_id=user.id, department="Operations", access_level=1)
     db.add(manager)
     
-    reputation = Reputation(user_id=user.id, score=0)
-    db.add(reputation)
+    db.execute(insert_or_ignore(db.get_bind(), Reputation, ["user_id"], user_id=user.id, score=0))
     
     db.commit()
     db.refresh(user)
     
     return user
+
+
+# -----------------------------------------------------------------------------
+# Transactions
+# -----------------------------------------------------------------------------
+
+@router.get("/transactions/export")
+async def export_transactions(
+    current_user: User = Depends(require_user_type(UserType.MANAGER)),
+    db: Session = Depends(get_db)
+):
+    """
+    Export all wallet transactions as CSV.
+    """
+    stmt = select(
+        Transaction.id,
+        Transaction.wallet_id,
+        Transaction.order_id,
+        Transaction.transaction_type,
+        Transaction.status,
+        Transaction.amount,
+        Transaction.balance_before,
+        Transaction.balance_after,
+        Transaction.payment_method,
+        Transaction.reference_number,
+        Transaction.created_at
+    ).order_by(Transaction.created_at)
+    
+    return _csv_response(db, stmt, "transactions.csv")
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _csv_response(db: Session, stmt, filename: str) -> StreamingResponse:
+    """
+    Stream a column SELECT as CSV, one batch of rows at a time.
+    
+    yield_per uses a server-side cursor where the driver supports one, so
+    only a single batch is ever held in memory.
+    """
+    result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    
+    def rows() -> Iterator[str]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(result.keys())
+        for batch in result.partitions():
+            writer.writerows(batch)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+    
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
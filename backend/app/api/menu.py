@@ -5,9 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from ..core.database import get_db
+from ..core.database import get_db, tags_overlap
 from ..core.security import get_current_active_user, require_user_type, get_optional_current_user
-from ..models.user import User, UserType, Chef, Customer
+from ..models.user import User, UserType
 from ..models.menu import Dish, DishCategory
 from ..schemas.menu import (
     DishCreate, DishUpdate, DishResponse,
@@ -28,6 +28,7 @@ async def browse_menu(
     search: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
+    tags: Optional[List[str]] = Query(None),
     include_special: bool = Query(False),
     current_user: Optional[User] = Depends(get_optional_current_user),
     db: Session = Depends(get_db)
@@ -39,6 +40,7 @@ async def browse_menu(
     - **chef_id**: Filter by chef
     - **search**: Search in dish name and description
     - **min_price** / **max_price**: Price range filter
+    - **tags**: Only dishes carrying any of these tags (repeat the parameter)
     - **include_special**: Include VIP-only dishes (requires VIP status)
     """
     query = db.query(Dish).filter(Dish.is_available == True)
@@ -62,6 +64,9 @@ async def browse_menu(
     if max_price is not None:
         query = query.filter(Dish.price <= max_price)
     
+    if tags:
+        query = query.filter(tags_overlap(db.get_bind(), Dish.tags, tags))
+    
     # Filter special dishes (VIP only)
     if not include_special:
         # Check user status
@@ -97,7 +102,7 @@ async def get_recommendations(
     - User preferences
     """
     # Get customer ID
-    customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
+    customer = current_user.customer
     
     # Create context
     context = {}
@@ -145,7 +150,7 @@ async def create_dish(
     Chefs can independently create and manage their dishes.
     """
     # Get chef record
-    chef = db.query(Chef).filter(Chef.user_id == current_user.id).first()
+    chef = current_user.chef
     if not chef:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -189,7 +194,7 @@ async def update_dish(
     Chefs can only update their own dishes.
     """
     # Get chef record
-    chef = db.query(Chef).filter(Chef.user_id == current_user.id).first()
+    chef = current_user.chef
     if not chef:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -209,7 +214,7 @@ async def update_dish(
         )
     
     # Update fields
-    update_data = dish_data.dict(exclude_unset=True)
+    update_data = dish_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(dish, field, value)
     
@@ -231,7 +236,7 @@ async def delete_dish(
     Actually marks as unavailable rather than deleting from database.
     """
     # Get chef record
-    chef = db.query(Chef).filter(Chef.user_id == current_user.id).first()
+    chef = current_user.chef
     if not chef:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -7,7 +7,7 @@ from typing import List
 
 from ..core.database import get_db
 from ..core.security import get_current_active_user, require_user_type
-from ..models.user import User, UserType, Customer
+from ..models.user import User, UserType
 from ..models.order import Order, OrderStatus
 from ..schemas.order import OrderCreate, OrderResponse, OrderRating, OrderItemResponse
 from ..services.order_service import OrderService
@@ -32,7 +32,7 @@ async def create_order(
     Order is rejected if wallet balance is insufficient.
     """
     # Get customer record
-    customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
+    customer = current_user.customer
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,7 +100,7 @@ async def list_orders(
     
     # Filter based on user type
     if current_user.user_type in [UserType.CUSTOMER, UserType.VIP]:
-        customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
+        customer = current_user.customer
         if customer:
             query = query.filter(Order.customer_id == customer.id)
     
@@ -126,8 +126,8 @@ async def list_orders(
         order_dict = {
             "id": order.id,
             "order_number": order.order_number,
-            "status": order.status.value,
-            "payment_status": order.payment_status.value,
+            "status": order.status,
+            "payment_status": order.payment_status,
             "subtotal": order.subtotal,
             "discount_amount": order.discount_amount,
             "delivery_fee": order.delivery_fee,
@@ -180,7 +180,7 @@ async def get_order(
     # Check permission (except managers)
     if current_user.user_type not in [UserType.MANAGER]:
         if current_user.user_type in [UserType.CUSTOMER, UserType.VIP]:
-            customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
+            customer = current_user.customer
             if not customer or order.customer_id != customer.id:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -196,8 +196,8 @@ async def get_order(
     order_dict = {
         "id": order.id,
         "order_number": order.order_number,
-        "status": order.status.value,
-        "payment_status": order.payment_status.value,
+        "status": order.status,
+        "payment_status": order.payment_status,
         "subtotal": order.subtotal,
         "discount_amount": order.discount_amount,
         "delivery_fee": order.delivery_fee,
@@ -243,7 +243,7 @@ async def rate_order(
     Can rate either or both. Order must be completed to rate.
     """
     # Get customer
-    customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
+    customer = current_user.customer
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -299,7 +299,7 @@ async def cancel_order(
     Refunds the amount to wallet.
     """
     # Get customer
-    customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
+    customer = current_user.customer
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -322,17 +322,17 @@ async def cancel_order(
     if order.status in [OrderStatus.IN_TRANSIT, OrderStatus.DELIVERED, OrderStatus.COMPLETED]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot cancel order in status: {order.status.value}"
+            detail=f"Cannot cancel order in status: {order.status}"
         )
     
-    # Update status
-    order_service = OrderService(db)
-    order_service.update_order_status(order_id, OrderStatus.CANCELLED)
-    
     # Refund if paid
     from ..services.payment_service import PaymentService
     payment_service = PaymentService(db)
     payment_service.refund_order(order_id)
     
+    # Update status; commits the refund in the same transaction
+    order_service = OrderService(db)
+    order_service.update_order_status(order_id, OrderStatus.CANCELLED)
+    
     return {"success": True, "message": "Order cancelled and refunded"}
 
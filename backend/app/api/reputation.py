@@ -2,10 +2,10 @@
 Reputation management API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, raiseload
 from typing import List
 
-from ..core.database import get_db
+from ..core.database import get_db, insert_or_ignore
 from ..core.security import get_current_active_user, require_user_type
 from ..models.user import User, UserType
 from ..models.reputation import Complaint, ComplaintStatus, Compliment
@@ -44,7 +44,7 @@ async def file_complaint(
         )
     
     # Check if subject exists
-    subject = db.query(User).filter(User.id == complaint_data.subject_id).first()
+    subject = db.get(User, complaint_data.subject_id)
     if not subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -99,7 +99,7 @@ async def give_compliment(
         )
     
     # Check if receiver exists
-    receiver = db.query(User).filter(User.id == compliment_data.receiver_id).first()
+    receiver = db.get(User, compliment_data.receiver_id)
     if not receiver:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -156,8 +156,8 @@ async def list_compliments(
     # Format response with user names
     result = []
     for c in compliments:
-        giver = db.query(User).filter(User.id == c.giver_id).first()
-        receiver = db.query(User).filter(User.id == c.receiver_id).first()
+        giver = db.get(User, c.giver_id)
+        receiver = db.get(User, c.receiver_id)
         result.append({
             "id": c.id,
             "giver_id": c.giver_id,
@@ -188,7 +188,11 @@ async def list_complaints(
     - Managers: See all complaints
     - **status_filter**: pending, resolved, disputed, rejected
     """
-    query = db.query(Complaint)
+    query = db.query(Complaint).options(
+        joinedload(Complaint.complainant),
+        joinedload(Complaint.subject),
+        raiseload("*")
+    )
     
     # Filter based on user type
     if current_user.user_type != UserType.MANAGER:
@@ -210,8 +214,8 @@ async def list_complaints(
     # Format response with user names
     result = []
     for c in complaints:
-        complainant = db.query(User).filter(User.id == c.complainant_id).first()
-        subject = db.query(User).filter(User.id == c.subject_id).first()
+        complainant = c.complainant
+        subject = c.subject
         result.append({
             "id": c.id,
             "complainant_id": c.complainant_id,
@@ -220,7 +224,7 @@ async def list_complaints(
             "subject": subject.full_name or subject.username if subject else "Unknown",
             "title": c.title,
             "description": c.description,
-            "status": c.status.value,
+            "status": c.status,
             "is_disputed": c.is_disputed,
             "dispute_reason": c.dispute_reason,
             "manager_decision": c.manager_decision,
@@ -242,7 +246,7 @@ async def get_complaint(
     
     Can view if you're involved or if you're a manager.
     """
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    complaint = db.get(Complaint, complaint_id)
     
     if not complaint:
         raise HTTPException(
@@ -275,7 +279,7 @@ async def dispute_complaint(
     
     Manager will review and make final decision.
     """
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    complaint = db.get(Complaint, complaint_id)
     
     if not complaint:
         raise HTTPException(
@@ -322,7 +326,7 @@ async def manager_decide_complaint(
     
     Final authority on all complaints.
     """
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    complaint = db.get(Complaint, complaint_id)
     
     if not complaint:
         raise HTTPException(
@@ -330,8 +334,7 @@ async def manager_decide_complaint(
             detail="Complaint not found"
         )
     
-    from ..models.user import Manager
-    manager = db.query(Manager).filter(Manager.user_id == current_user.id).first()
+    manager = current_user.manager
     
     # Record decision
     complaint.manager_decision = decision_data.decision
@@ -382,14 +385,15 @@ async def get_user_reputation(
     """
     from ..models.reputation import Reputation
     
-    reputation = db.query(Reputation).filter(Reputation.user_id == user_id).first()
+    reputation = db.query(Reputation).options(raiseload("*")).filter(
+        Reputation.user_id == user_id
+    ).first()
     
     if not reputation:
-        # Create if doesn't exist
-        reputation = Reputation(user_id=user_id, score=0)
-        db.add(reputation)
+        # Create if doesn't exist (a concurrent request may have beaten us to it)
+        db.execute(insert_or_ignore(db.get_bind(), Reputation, ["user_id"], user_id=user_id, score=0))
         db.commit()
-        db.refresh(reputation)
+        reputation = db.query(Reputation).filter(Reputation.user_id == user_id).first()
     
     return reputation
 
@@ -434,7 +438,7 @@ async def issue_warning(
     - 2 warnings for VIP: Demotion
     """
     # Check if user exists
-    user = db.query(User).filter(User.id == warning_data.user_id).first()
+    user = db.get(User, warning_data.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
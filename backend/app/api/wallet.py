@@ -3,12 +3,15 @@ Wallet and payment API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core.database import get_db, get_async_db, insert_or_ignore
 from ..core.security import get_current_active_user, require_user_type
 from ..models.user import User, UserType, Customer
 from ..models.wallet import Wallet
+from ..schemas.base import ResponseModel
 from ..services.payment_service import PaymentService
 
 router = APIRouter()
@@ -20,21 +23,18 @@ class DepositRequest(BaseModel):
     payment_method: str = Field(default="credit_card", description="Payment method")
 
 
-class WalletResponse(BaseModel):
+class WalletResponse(ResponseModel):
     """Schema for wallet response."""
     balance: float
     total_deposited: float
     total_spent: float
     total_refunded: float
-    
-    class Config:
-        from_attributes = True
 
 
 @router.get("/wallet", response_model=WalletResponse)
 async def get_wallet(
     current_user: User = Depends(require_user_type(UserType.CUSTOMER, UserType.VIP)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user's wallet balance and transaction summary.
@@ -42,21 +42,20 @@ async def get_wallet(
     Returns wallet information including current balance.
     """
     # Get customer record
-    customer = db.query(Customer).filter(Customer.user_id == current_user.id).first()
-    if not customer:
+    customer_id = await db.scalar(select(Customer.id).where(Customer.user_id == current_user.id))
+    if customer_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer record not found"
         )
     
     # Get wallet
-    wallet = db.query(Wallet).filter(Wallet.user_id == current_user.id).first()
+    wallet = await db.scalar(select(Wallet).where(Wallet.user_id == current_user.id))
     if not wallet:
-        # Create wallet if it doesn't exist
-        wallet = Wallet(user_id=current_user.id, balance=0.0)
-        db.add(wallet)
-        db.commit()
-        db.refresh(wallet)
+        # Create wallet if it doesn't exist (a concurrent request may have beaten us to it)
+        await db.execute(insert_or_ignore(db.bind, Wallet, ["user_id"], user_id=current_user.id, balance=0.0))
+        await db.commit()
+        wallet = await db.scalar(select(Wallet).where(Wallet.user_id == current_user.id))
     
     return wallet
 
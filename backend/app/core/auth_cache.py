@@ -0,0 +1,81 @@
+"""
+Shared cache for decoded authentication data.
+
+Entries are kept in a small in-process TTL map (L1) and, when
+AUTH_CACHE_USE_REDIS is enabled, in Redis (L2) so that a warm cache is
+shared by every worker behind the load balancer.
+"""
+import hashlib
+import time
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis is optional for local development
+    aioredis = None
+
+# Upper bound on how long a cached entry may outlive a change to the user
+MAX_TTL_SECONDS = 30
+L1_MAX_ENTRIES = 10000
+
+_local: Dict[str, Tuple[float, bytes]] = {}
+_redis = None
+
+
+def token_key(token: str) -> str:
+    """Cache key for a raw JWT (the token itself is never stored)."""
+    return "jwt:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _get_redis():
+    """Lazily create the shared Redis client, or None if disabled."""
+    global _redis
+    if _redis is None and settings.AUTH_CACHE_USE_REDIS and aioredis is not None:
+        _redis = aioredis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+async def get(key: str) -> Optional[bytes]:
+    """Return the cached value for key, checking L1 before Redis."""
+    entry = _local.get(key)
+    if entry is not None:
+        expires_at, value = entry
+        if expires_at > time.monotonic():
+            return value
+        _local.pop(key, None)
+
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        value = await client.get(key)
+    except Exception:
+        # A cache outage must never take authentication down with it
+        return None
+    if value is not None:
+        _set_local(key, value, MAX_TTL_SECONDS)
+    return value
+
+
+async def set(key: str, value: bytes, ttl: int) -> None:
+    """Store value in both cache levels for at most MAX_TTL_SECONDS."""
+    ttl = min(int(ttl), MAX_TTL_SECONDS)
+    if ttl <= 0:
+        return
+    _set_local(key, value, ttl)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        await client.set(key, value, ex=ttl)
+    except Exception:
+        pass
+
+
+def _set_local(key: str, value: bytes, ttl: int) -> None:
+    if len(_local) >= L1_MAX_ENTRIES:
+        _local.clear()
+    _local[key] = (time.monotonic() + ttl, value)
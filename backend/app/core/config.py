@@ -11,6 +11,9 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./aislice.db"
     DATABASE_URL_ASYNC: str = "sqlite+aiosqlite:///./aislice.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -22,8 +25,14 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     USE_LOCAL_LLM: bool = True
     
+    # Knowledge base semantic search (empty model name disables it)
+    KB_EMBEDDING_MODEL: str = ""  # e.g. "all-MiniLM-L6-v2"
+    KB_EMBEDDING_DIM: int = 384
+    KB_SEMANTIC_MIN_SIMILARITY: float = 0.75
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    AUTH_CACHE_USE_REDIS: bool = False
     
     # Application
     APP_NAME: str = "AI-Slice"
@@ -1,23 +1,218 @@
 """
 Database connection and session management.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import DDL, JSON, CheckConstraint, Numeric, SmallInteger, Text, TypeDecorator, create_engine, event, exists, func, inspect, literal_column, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.types import UserDefinedType
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+import enum
+
+# psycopg2 only: also send executemany UPDATE/DELETE (e.g. per-dish rating
+# updates) in execute_batch pages instead of one round trip per row
+_driver_options = (
+    {"executemany_mode": "values_plus_batch"}
+    if make_url(settings.DATABASE_URL).get_driver_name() == "psycopg2" else {}
+)
+
+# Server databases: a warm, bounded pool that drops connections the server
+# (or a proxy) has silently closed. SQLite keeps SQLAlchemy's defaults
+_pool_options = (
+    {} if "sqlite" in settings.DATABASE_URL else {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+)
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    # Room for every distinct statement the app issues, so none are recompiled
+    query_cache_size=1200,
+    # Batch executemany INSERTs into large multi-VALUES pages
+    insertmanyvalues_page_size=5000,
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    **_pool_options,
+    **_driver_options
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for I/O-bound endpoints that should not hop to the threadpool
+async_engine = create_async_engine(
+    settings.DATABASE_URL_ASYNC,
+    **({} if "sqlite" in settings.DATABASE_URL_ASYNC else _pool_options)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
+# Currency columns: exact to the cent in the database, plain floats in Python
+Money = Numeric(12, 2, asdecimal=False)
+
+# Tag lists: text[] (GIN-indexable) on PostgreSQL, a JSON array elsewhere
+TagList = ARRAY(Text).with_variant(JSON(), "sqlite")
+
+
+def tag_elements(bind, column):
+    """The individual tags of a TagList column, for use inside a correlated subquery."""
+    if bind.dialect.name == "postgresql":
+        return func.unnest(column).column_valued("tag")
+    return func.json_each(column).table_valued("value").c.value
+
+
+def has_tag(bind, column, tag: str, ignore_case: bool = False):
+    """Filter expression: true when the TagList column contains tag."""
+    element = tag_elements(bind, column)
+    if ignore_case:
+        element, tag = func.lower(element), tag.lower()
+    return exists(select(1).where(element == tag))
+
+
+def count_tags(bind, column, tags: list):
+    """Scalar expression: how many distinct tags of the TagList column are in tags."""
+    element = tag_elements(bind, column)
+    return select(func.count(element.distinct())).where(element.in_(tags)).scalar_subquery()
+
+
+class Vector(UserDefinedType):
+    """
+    pgvector VECTOR(dim) column holding a list of floats.
+    
+    Values travel in pgvector's text form ('[0.1,0.2,...]'), so no client
+    library is needed. Use .with_variant(JSON(), "sqlite") for SQLite.
+    """
+    cache_ok = True
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+    
+    def get_col_spec(self, **kw):
+        return f"VECTOR({self.dim})"
+    
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            return "[" + ",".join(repr(float(v)) for v in value) + "]"
+        return process
+    
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or isinstance(value, list):
+                return value
+            return [float(v) for v in value.strip("[]").split(",")]
+        return process
+
+
+def tags_overlap(bind, column, tags: list):
+    """Filter expression: true when the TagList column shares any tag with tags."""
+    if bind.dialect.name == "postgresql":
+        return column.overlap(tags)
+    return exists(
+        select(1)
+        .select_from(func.json_each(column))
+        .where(literal_column("json_each.value").in_(tags))
+    )
+
+
+def enum_check(column: str, enum_cls, name: str) -> CheckConstraint:
+    """CHECK constraint restricting a string column to the values of an enum."""
+    values = ", ".join(f"'{member.value}'" for member in enum_cls)
+    return CheckConstraint(f"{column} IN ({values})", name=name)
+
+
+class StatusCode(TypeDecorator):
+    """
+    Store a string enum as a SMALLINT code.
+    
+    Python code keeps reading and writing the string values (or str enum
+    members); only the database sees the compact integer. Codes are part
+    of the schema, so existing entries in the mapping must never change.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, codes: dict):
+        super().__init__()
+        # Hashable copy for the statement cache key
+        self.codes = tuple(codes.items())
+        self._to_code = dict(codes)
+        self._to_value = {code: value for value, code in codes.items()}
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, enum.Enum):
+            value = value.value
+        return self._to_code[value]
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._to_value[value]
+
+
+def code_check(column: str, codes: dict, name: str) -> CheckConstraint:
+    """CHECK constraint restricting a StatusCode column to its known codes."""
+    return CheckConstraint(f"{column} BETWEEN {min(codes.values())} AND {max(codes.values())}", name=name)
+
+
+_SET_UPDATED_AT_PG = DDL("""
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+
+def updated_at_trigger(table) -> None:
+    """
+    Maintain table.updated_at with a row-level trigger instead of ORM onupdate.
+    
+    The trigger fires for ORM flushes and bulk UPDATE statements alike. Map the
+    column with server_onupdate=FetchedValue() so the ORM knows to refresh it.
+    """
+    name = table.name
+    event.listen(table, "after_create", _SET_UPDATED_AT_PG.execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{name}_updated BEFORE UPDATE ON {name} "
+        f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+    ).execute_if(dialect="postgresql"))
+    # SQLite cannot assign NEW in a BEFORE trigger; recursive_triggers is off by default
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{name}_updated AFTER UPDATE ON {name} FOR EACH ROW "
+        f"WHEN NEW.updated_at IS OLD.updated_at "
+        f"BEGIN UPDATE {name} SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id; END"
+    ).execute_if(dialect="sqlite"))
+
+
+def insert_or_ignore(bind, model, index_elements, **values):
+    """
+    Build an INSERT ... ON CONFLICT DO NOTHING RETURNING id statement.
+    
+    Executing it yields the new primary key, or no row if a row matching
+    index_elements already exists.
+    """
+    insert = pg_insert if bind.dialect.name == "postgresql" else sqlite_insert
+    return (
+        insert(model)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=index_elements)
+        .returning(model.id)
+    )
+
 
 def get_db():
     """
@@ -31,7 +226,24 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency function to get an async database session.
+    Yields an AsyncSession and closes it after use.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 def init_db():
-    """Initialize database tables."""
-    Base.metadata.create_all(bind=engine)
+    """
+    Initialize database tables.
+    
+    Lists the existing tables in one query and creates only the missing
+    ones, instead of create_all probing every table in turn.
+    """
+    existing = set(inspect(engine).get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=engine, tables=missing, checkfirst=False)
 
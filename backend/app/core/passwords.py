@@ -0,0 +1,42 @@
+"""
+Password hashing, kept free of web-framework imports so scripts can use it.
+"""
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import bcrypt
+
+# Argon2id with the OWASP minimum profile (19 MiB, 2 passes, 1 lane)
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19 * 1024, parallelism=1)
+
+
+def _is_argon2(hashed_password: bytes) -> bool:
+    return hashed_password.startswith(b"$argon2")
+
+
+def verify_password(plain_password: str, hashed_password: bytes) -> bool:
+    """Verify a password against its hash (Argon2id, or legacy bcrypt)."""
+    # Rows written before hashes were stored as bytes come back as str
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    
+    if _is_argon2(hashed_password):
+        try:
+            return password_hasher.verify(hashed_password.decode('ascii'), plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    
+    return bcrypt.checkpw(plain_password.encode('utf-8')[:72], hashed_password)
+
+
+def password_needs_rehash(hashed_password: bytes) -> bool:
+    """True for legacy bcrypt hashes or Argon2 hashes with outdated parameters."""
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    if not _is_argon2(hashed_password):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password.decode('ascii'))
+
+
+def get_password_hash(password: str) -> bytes:
+    """Hash a password using Argon2id."""
+    return password_hasher.hash(password).encode('ascii')
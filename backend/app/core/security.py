@@ -1,40 +1,45 @@
 """
 Security utilities for authentication and password handling.
 """
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
+import orjson
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
+from . import auth_cache
 from .config import settings
 from .database import get_db
-from ..models.user import User
+from .passwords import verify_password, password_needs_rehash, get_password_hash
+from ..models.user import User, UserType
+
+# The password helpers live in .passwords (free of FastAPI, for scripts)
+# and are re-exported here for the API
+__all__ = [
+    "verify_password", "password_needs_rehash", "get_password_hash",
+    "oauth2_scheme", "oauth2_scheme_optional", "ACCESS_TTL_SECONDS", "ROLE_RELATIONSHIPS",
+    "create_access_token", "decode_access_token", "get_token_payload", "load_user",
+    "get_current_user", "get_current_active_user", "get_optional_current_user", "require_user_type",
+]
 
 # OAuth2 scheme for token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="api/auth/login", auto_error=False)
 
+# Default token lifetime, resolved once at import
+ACCESS_TTL_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
-
-
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt."""
-    # bcrypt has a 72 byte limit
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
-    return hashed.decode('utf-8')
+# Role row to load alongside the user for each user_type claimed in the token
+ROLE_RELATIONSHIPS = {
+    UserType.CUSTOMER.value: User.customer,
+    UserType.VIP.value: User.customer,
+    UserType.CHEF.value: User.chef,
+    UserType.DELIVERY.value: User.delivery_person,
+    UserType.MANAGER.value: User.manager,
+}
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -50,12 +55,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
+    ttl = int(expires_delta.total_seconds()) if expires_delta else ACCESS_TTL_SECONDS
+    to_encode["exp"] = int(time.time()) + ttl
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
@@ -78,6 +79,36 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+async def get_token_payload(token: str) -> Optional[dict]:
+    """
+    Decode a JWT, reusing a recent decode from the shared auth cache.
+    
+    Only valid tokens are cached, and never beyond their own expiry.
+    """
+    key = auth_cache.token_key(token)
+    cached = await auth_cache.get(key)
+    if cached is not None:
+        return orjson.loads(cached)
+    
+    payload = decode_access_token(token)
+    if payload is not None:
+        ttl = payload.get("exp", 0) - int(time.time())
+        await auth_cache.set(key, orjson.dumps(payload), ttl)
+    return payload
+
+
+def load_user(db: Session, user_id: int, user_type: Optional[str] = None) -> Optional[User]:
+    """
+    Load a user together with the role row matching their user_type claim.
+    
+    The dependency result is cached for the whole request, so endpoints can
+    use current_user.customer / .chef / .manager without another query.
+    """
+    role = ROLE_RELATIONSHIPS.get(user_type)
+    options = [joinedload(role)] if role is not None else []
+    return db.get(User, user_id, options=options)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -101,7 +132,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_access_token(token)
+    payload = await get_token_payload(token)
     if payload is None:
         raise credentials_exception
     
@@ -114,7 +145,7 @@ async def get_current_user(
     except (ValueError, TypeError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = load_user(db, user_id, payload.get("user_type"))
     if user is None:
         raise credentials_exception
     
@@ -141,7 +172,7 @@ async def get_current_active_user(
     if current_user.status != UserStatus.ACTIVE:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User account is {current_user.status.value}"
+            detail=f"User account is {current_user.status}"
         )
     
     return current_user
@@ -157,7 +188,7 @@ async def get_optional_current_user(
     if not token:
         return None
         
-    payload = decode_access_token(token)
+    payload = await get_token_payload(token)
     if payload is None:
         return None
     
@@ -170,8 +201,7 @@ async def get_optional_current_user(
     except (ValueError, TypeError):
         return None
     
-    user = db.query(User).filter(User.id == user_id).first()
-    return user
+    return load_user(db, user_id, payload.get("user_type"))
 
 
 
@@ -185,15 +215,13 @@ def require_user_type(*allowed_types):
     Returns:
         Dependency function
     """
-    from ..models.user import UserType
-    
     async def user_type_checker(
         current_user: User = Depends(get_current_active_user)
     ) -> User:
         if current_user.user_type not in allowed_types:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"User type {current_user.user_type.value} not allowed for this operation"
+                detail=f"User type {current_user.user_type} not allowed for this operation"
             )
         return current_user
     
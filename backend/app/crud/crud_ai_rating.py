@@ -1,13 +1,14 @@
 """
 CRUD operations for AI ratings.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.ai import AIRating
 from ..schemas.ai import AIRatingCreate, AIRatingUpdate
 
 
-def create_rating(db: Session, rating_in: AIRatingCreate) -> AIRating:
+async def create_rating(db: AsyncSession, rating_in: AIRatingCreate) -> AIRating:
     """Create a new AI rating record."""
     db_rating = AIRating(
         chat_log_id=rating_in.chat_log_id,
@@ -15,23 +16,35 @@ def create_rating(db: Session, rating_in: AIRatingCreate) -> AIRating:
         feedback=rating_in.feedback,
     )
     db.add(db_rating)
-    db.commit()
-    db.refresh(db_rating)
+    await db.commit()
+    await db.refresh(db_rating)
     return db_rating
 
 
-def update_rating(db: Session, rating_id: int, rating_in: AIRatingUpdate) -> AIRating | None:
-    """Update an existing AI rating; returns None if not found."""
-    rating = db.query(AIRating).filter(AIRating.id == rating_id).first()
-    if not rating:
+async def update_rating(db: AsyncSession, rating_id: int, rating_in: AIRatingUpdate) -> AIRating | None:
+    """Update an existing AI rating; returns None if not found.
+
+    Issues a single UPDATE ... RETURNING where the dialect supports it, so
+    concurrent raters never overwrite each other through a stale read.
+    """
+    values = {
+        k: v for k, v in rating_in.model_dump(exclude_unset=True).items() if v is not None
+    }
+    if not values:
+        return await db.get(AIRating, rating_id)
+
+    stmt = update(AIRating).where(AIRating.id == rating_id).values(**values)
+    if db.bind.dialect.update_returning:
+        result = await db.execute(
+            stmt.returning(AIRating), execution_options={"synchronize_session": False}
+        )
+        rating = result.scalar_one_or_none()
+        await db.commit()
+        return rating
+
+    # SQLite < 3.35 has no RETURNING: update, then read the row back
+    result = await db.execute(stmt, execution_options={"synchronize_session": False})
+    await db.commit()
+    if result.rowcount == 0:
         return None
-
-    if rating_in.rating is not None:
-        rating.rating = rating_in.rating
-    if rating_in.feedback is not None:
-        rating.feedback = rating_in.feedback
-
-    db.commit()
-    db.refresh(rating)
-    return rating
-
+    return await db.get(AIRating, rating_id)
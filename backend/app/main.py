@@ -1,17 +1,37 @@
 """
 Main FastAPI application for AI-Slice.
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .core.config import settings
 from .core.database import init_db
+from .services import embeddings
+from .api import auth, orders, menu, delivery, ai, reputation, manager, wallet, chef, forum
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database and embedding model on startup without blocking the event loop."""
+    await asyncio.to_thread(init_db)
+    await asyncio.to_thread(embeddings.warm_up)
+    print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} started!")
+    print(f"📚 API documentation available at http://localhost:8000/docs")
+    yield
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="AI-enabled online restaurant order and delivery system"
+    description="AI-enabled online restaurant order and delivery system",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -23,13 +43,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup."""
-    init_db()
-    print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} started!")
-    print(f"📚 API documentation available at http://localhost:8000/docs")
+# Compress larger JSON payloads (menus, order history, knowledge base)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 
 @app.get("/")
@@ -49,8 +64,7 @@ async def health_check():
     return {"status": "healthy"}
 
 
-# Import and include API routers
-from .api import auth, orders, menu, delivery, ai, reputation, manager, wallet, chef, forum
+# Include API routers
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
@@ -1,16 +1,41 @@
 """
 AI and knowledge base-related database models.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import DDL, JSON, Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Index, event, literal_column, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
-from ..core.database import Base
+from ..core.config import settings
+from ..core.database import Base, TagList, Vector
+
+
+# pgvector (extension, VECTOR column, HNSW index) is only part of the schema
+# when semantic search is configured; otherwise the column is plain JSON and
+# PostgreSQL needs no extension. Enabling it later means migrating the column
+SEMANTIC_SEARCH = bool(settings.KB_EMBEDDING_MODEL)
 
 
 class KnowledgeBase(Base):
     """Local knowledge base for AI responses."""
     __tablename__ = "knowledge_base"
+    __table_args__ = (
+        Index("ix_knowledge_base_tags_gin", "tags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index(
+            "ix_knowledge_base_question_fts", text("to_tsvector('english'::regconfig, question)"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # Exact (case-insensitive) question lookups, which only ever consider
+        # unflagged entries
+        Index(
+            "ix_knowledge_base_question_lower", text("lower(question)"),
+            postgresql_where=text("NOT is_flagged"), sqlite_where=text("is_flagged = 0")
+        ),
+    ) + ((
+        Index(
+            "ix_knowledge_base_embedding_hnsw", "embedding",
+            postgresql_using="hnsw", postgresql_ops={"embedding": "vector_l2_ops"}
+        ).ddl_if(dialect="postgresql"),
+    ) if SEMANTIC_SEARCH else ())
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -18,7 +43,13 @@ class KnowledgeBase(Base):
     answer = Column(Text, nullable=False)
     
     category = Column(String)  # menu, delivery, restaurant_info, policies, etc.
-    tags = Column(String)  # comma-separated tags for search
+    tags = Column(TagList, default=list)  # tags for search
+    
+    # Unit-length question embedding for semantic search (see services.embeddings)
+    embedding = Column(
+        Vector(settings.KB_EMBEDDING_DIM).with_variant(JSON(), "sqlite") if SEMANTIC_SEARCH else JSON(),
+        nullable=True
+    )
     
     # Quality tracking
     times_used = Column(Integer, default=0)
@@ -40,6 +71,18 @@ class KnowledgeBase(Base):
         return f"<KnowledgeBase #{self.id}: {self.question[:50]}>"
 
 
+if SEMANTIC_SEARCH:
+    event.listen(
+        KnowledgeBase.__table__, "before_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS vector").execute_if(dialect="postgresql")
+    )
+
+
+# English full-text vector of the question; must match the expression of
+# ix_knowledge_base_question_fts exactly for PostgreSQL to use the index
+kb_question_tsv = func.to_tsvector(literal_column("'english'::regconfig"), KnowledgeBase.question)
+
+
 class ChatLog(Base):
     """Chat interaction log."""
     __tablename__ = "chat_logs"
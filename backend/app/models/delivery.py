@@ -1,15 +1,15 @@
 """
 Delivery and bidding-related database models.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
-from ..core.database import Base
+from ..core.database import Base, enum_check
 
 
-class DeliveryStatus(enum.Enum):
+class DeliveryStatus(str, enum.Enum):
     """Delivery status enumeration."""
     PENDING_BIDDING = "pending_bidding"
     NO_BIDDERS = "no_bidders"
@@ -21,7 +21,7 @@ class DeliveryStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
-class BidStatus(enum.Enum):
+class BidStatus(str, enum.Enum):
     """Bid status enumeration."""
     PENDING = "pending"
     ACCEPTED = "accepted"
@@ -29,7 +29,7 @@ class BidStatus(enum.Enum):
     EXPIRED = "expired"
 
 
-class AssignmentType(enum.Enum):
+class AssignmentType(str, enum.Enum):
     """Assignment type enumeration."""
     AUTO_ASSIGN = "auto_assign"  # Lowest bidder
     MANAGER_OVERRIDE = "manager_override"  # Manager chose higher bidder
@@ -39,13 +39,17 @@ class AssignmentType(enum.Enum):
 class Delivery(Base):
     """Delivery model."""
     __tablename__ = "deliveries"
+    __table_args__ = (
+        enum_check("status", DeliveryStatus, "ck_delivery_status"),
+        enum_check("assignment_type", AssignmentType, "ck_delivery_assignment_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), unique=True, nullable=False)
     delivery_person_id = Column(Integer, ForeignKey("delivery_persons.id"), nullable=True)
     
-    status = Column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING_BIDDING)
-    assignment_type = Column(Enum(AssignmentType), nullable=True)
+    status = Column(String(24), default=DeliveryStatus.PENDING_BIDDING.value)
+    assignment_type = Column(String(24), nullable=True)
     
     # Location information
     pickup_address = Column(Text)
@@ -77,19 +81,25 @@ class Delivery(Base):
     bids = relationship("DeliveryBid", back_populates="delivery")
     
     def __repr__(self):
-        return f"<Delivery Order {self.order_id}: {self.status.value}>"
+        return f"<Delivery Order {self.order_id}: {self.status}>"
 
 
 class DeliveryBid(Base):
     """Delivery bid model."""
     __tablename__ = "delivery_bids"
+    __table_args__ = (
+        enum_check("status", BidStatus, "ck_delivery_bid_status"),
+        # Pending-bid lookups; trailing columns match the lowest-bid ORDER BY
+        Index("ix_delivery_bids_delivery_status", "delivery_id", "status", "bid_amount", "created_at"),
+        UniqueConstraint("delivery_id", "delivery_person_id", name="uq_delivery_bids_delivery_person"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False)
     delivery_person_id = Column(Integer, ForeignKey("delivery_persons.id"), nullable=False)
     
     bid_amount = Column(Float, nullable=False)
-    status = Column(Enum(BidStatus), default=BidStatus.PENDING)
+    status = Column(String(24), default=BidStatus.PENDING.value)
     
     estimated_time = Column(Integer)  # in minutes
     notes = Column(Text)
@@ -1,7 +1,7 @@
 """
 Forum-related database models.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -29,7 +29,10 @@ class ForumTopic(Base):
     
     # Relationships
     author = relationship("User", back_populates="forum_topics")
-    posts = relationship("ForumPost", back_populates="topic", cascade="all, delete-orphan")
+    posts = relationship(
+        "ForumPost", back_populates="topic", cascade="all, delete-orphan",
+        order_by="ForumPost.created_at"
+    )
     
     def __repr__(self):
         return f"<ForumTopic {self.title}>"
@@ -38,6 +41,9 @@ class ForumTopic(Base):
 class ForumPost(Base):
     """Forum post (reply) model."""
     __tablename__ = "forum_posts"
+    __table_args__ = (
+        Index("ix_forum_posts_topic_created", "topic_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     topic_id = Column(Integer, ForeignKey("forum_topics.id"), nullable=False)
@@ -1,11 +1,11 @@
 """
 Menu and dish-related database models.
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
-from ..core.database import Base
+from ..core.database import Base, TagList
 
 
 class DishCategory(Base):
@@ -22,6 +22,14 @@ class DishCategory(Base):
 class Dish(Base):
     """Dish/Menu item model."""
     __tablename__ = "dishes"
+    __table_args__ = (
+        Index("ix_dishes_tags_gin", "tags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Browse order for the public menu, over available dishes only
+        Index(
+            "ix_dishes_available_popular", "average_rating", "times_ordered",
+            postgresql_where=text("is_available"), sqlite_where=text("is_available = 1")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     chef_id = Column(Integer, ForeignKey("chefs.id"), nullable=False)
@@ -35,8 +43,8 @@ class Dish(Base):
     is_available = Column(Boolean, default=True)
     is_special = Column(Boolean, default=False)  # Chef special for VIP
     
-    # Tags for recommendations (stored as comma-separated string)
-    tags = Column(String)  # e.g., "spicy,vegan,italian"
+    # Tags for recommendations, e.g. ["spicy", "vegan", "italian"]
+    tags = Column(TagList, default=list)
     
     # Popularity metrics
     times_ordered = Column(Integer, default=0)
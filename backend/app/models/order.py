@@ -1,15 +1,15 @@
 """
 Order-related database models.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
-from ..core.database import Base
+from ..core.database import Base, enum_check
 
 
-class OrderStatus(enum.Enum):
+class OrderStatus(str, enum.Enum):
     """Order status enumeration."""
     CART = "cart"
     PENDING_PAYMENT = "pending_payment"
@@ -24,7 +24,7 @@ class OrderStatus(enum.Enum):
     REJECTED = "rejected"
 
 
-class PaymentStatus(enum.Enum):
+class PaymentStatus(str, enum.Enum):
     """Payment status enumeration."""
     PENDING = "pending"
     PAID = "paid"
@@ -35,14 +35,20 @@ class PaymentStatus(enum.Enum):
 class Order(Base):
     """Order model."""
     __tablename__ = "orders"
+    __table_args__ = (
+        enum_check("status", OrderStatus, "ck_order_status"),
+        enum_check("payment_status", PaymentStatus, "ck_order_payment_status"),
+        # Customer order history, newest first
+        Index("ix_orders_customer_created", "customer_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
     
     order_number = Column(String, unique=True, index=True)
     
-    status = Column(Enum(OrderStatus), default=OrderStatus.CART)
-    payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
+    status = Column(String(24), default=OrderStatus.CART.value)
+    payment_status = Column(String(24), default=PaymentStatus.PENDING.value)
     
     # Pricing
     subtotal = Column(Float, default=0.0)
@@ -72,7 +78,7 @@ class Order(Base):
     transaction = relationship("Transaction", back_populates="order", uselist=False)
     
     def __repr__(self):
-        return f"<Order {self.order_number} - {self.status.value}>"
+        return f"<Order {self.order_number} - {self.status}>"
 
 
 class OrderItem(Base):
@@ -80,7 +86,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     dish_id = Column(Integer, ForeignKey("dishes.id"), nullable=False)
     
     quantity = Column(Integer, nullable=False)
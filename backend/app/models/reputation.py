@@ -1,15 +1,19 @@
 """
 Reputation and complaint/compliment-related database models.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, DateTime, ForeignKey, Text, Boolean, Index, JSON, UniqueConstraint, insert, text, FetchedValue
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 import enum
+import io
 
-from ..core.database import Base
+from ..core.database import Base, StatusCode, code_check, enum_check, updated_at_trigger
 
 
-class ReputationEventType(enum.Enum):
+class ReputationEventType(str, enum.Enum):
     """Reputation event type enumeration."""
     COMPLAINT = "complaint"
     COMPLIMENT = "compliment"
@@ -23,7 +27,7 @@ class ReputationEventType(enum.Enum):
     RATING_RECEIVED = "rating_received"
 
 
-class ComplaintStatus(enum.Enum):
+class ComplaintStatus(str, enum.Enum):
     """Complaint status enumeration."""
     PENDING = "pending"
     UNDER_REVIEW = "under_review"
@@ -32,58 +36,141 @@ class ComplaintStatus(enum.Enum):
     REJECTED = "rejected"
 
 
+# Stored SMALLINT codes; append only, never renumber
+COMPLAINT_STATUS_CODES = {"pending": 0, "under_review": 1, "resolved": 2, "disputed": 3, "rejected": 4}
+
+
 class Reputation(Base):
     """User reputation tracking model."""
     __tablename__ = "reputations"
+    __table_args__ = (
+        UniqueConstraint("user_id", name="uq_reputations_user"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
-    score = Column(Integer, default=0)
+    score = Column(SmallInteger, default=0)
     
-    total_complaints = Column(Integer, default=0)
-    total_compliments = Column(Integer, default=0)
-    total_warnings = Column(Integer, default=0)
+    total_complaints = Column(SmallInteger, default=0)
+    total_compliments = Column(SmallInteger, default=0)
+    total_warnings = Column(SmallInteger, default=0)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue())
     
     # Relationships
     user = relationship("User", back_populates="reputation")
-    events = relationship("ReputationEvent", back_populates="reputation")
+    events = relationship("ReputationEvent", back_populates="reputation", lazy="raise_on_sql")
     
     def __repr__(self):
         return f"<Reputation User {self.user_id}: Score {self.score}>"
 
 
+updated_at_trigger(Reputation.__table__)
+
+
 class ReputationEvent(Base):
     """Individual reputation events."""
     __tablename__ = "reputation_events"
+    __table_args__ = (
+        enum_check("event_type", ReputationEventType, "ck_reputation_event_type"),
+        Index("ix_reputation_events_rep_type_created", "reputation_id", "event_type", "created_at"),
+        Index("ix_reputation_events_details_gin", "details", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    reputation_id = Column(Integer, ForeignKey("reputations.id"), nullable=False)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    reputation_id: Mapped[int] = mapped_column(ForeignKey("reputations.id"))
     
-    event_type = Column(Enum(ReputationEventType), nullable=False)
-    score_change = Column(Integer, default=0)
+    event_type: Mapped[str] = mapped_column(String(24), index=True)
+    score_change: Mapped[Optional[int]] = mapped_column(Integer, default=0)
     
-    description = Column(Text)
-    details = Column(Text)  # JSON string for additional details
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    details: Mapped[Optional[Any]] = mapped_column(
+        JSONB().with_variant(JSON(), "sqlite")
+    )  # Structured event details
     
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
     
     # Relationships
-    reputation = relationship("Reputation", back_populates="events")
+    reputation: Mapped["Reputation"] = relationship(back_populates="events")
     
     def __repr__(self):
-        return f"<ReputationEvent {self.event_type.value}: {self.score_change:+d}>"
+        return f"<ReputationEvent {self.event_type}: {self.score_change:+d}>"
+
+
+# Below this many rows a plain executemany INSERT beats setting up COPY
+COPY_THRESHOLD = 100
+_COPY_COLUMNS = ("reputation_id", "event_type", "score_change", "description")
+
+
+def _copy_value(value) -> str:
+    """Render a value in PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, enum.Enum):
+        value = value.value
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def bulk_copy_events(session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Bulk-insert reputation events for backfills and recalculation jobs.
+    
+    Each row is a dict with reputation_id, event_type, score_change and
+    description. Large batches on PostgreSQL (psycopg2) are streamed with
+    COPY FROM; anything else falls back to a single executemany INSERT.
+    Score totals on Reputation are not touched.
+    """
+    if not rows:
+        return
+    
+    bind = session.get_bind()
+    if len(rows) < COPY_THRESHOLD or bind.dialect.driver != "psycopg2":
+        session.execute(
+            insert(ReputationEvent),
+            [{column: row.get(column) for column in _COPY_COLUMNS} for row in rows]
+        )
+        return
+    
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(row.get(column)) for column in _COPY_COLUMNS))
+        buf.write("\n")
+    buf.seek(0)
+    
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_from(buf, ReputationEvent.__tablename__, sep="\t", columns=_COPY_COLUMNS)
+    finally:
+        cursor.close()
 
 
 class Complaint(Base):
     """Complaint model."""
     __tablename__ = "complaints"
-    
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        code_check("status", COMPLAINT_STATUS_CODES, "ck_complaint_status"),
+        Index("ix_complaints_subject_status", "subject_id", "status"),
+        # Small hot index for "open complaints against user X", ordered by id
+        # so the oldest one (cancelled by a compliment) is the first entry
+        Index(
+            "ix_complaints_pending", "subject_id", "id",
+            postgresql_where=text("status = 0"), sqlite_where=text("status = 0")
+        ),
+        Index("ix_complaints_complainant_created", "complainant_id", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
     
     # Who filed the complaint
     complainant_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -97,7 +184,7 @@ class Complaint(Base):
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     
-    status = Column(Enum(ComplaintStatus), default=ComplaintStatus.PENDING)
+    status = Column(StatusCode(COMPLAINT_STATUS_CODES), default=ComplaintStatus.PENDING.value, nullable=False, index=True)
     
     # Dispute information
     is_disputed = Column(Boolean, default=False)
@@ -109,10 +196,10 @@ class Complaint(Base):
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     
     # Weight (VIP complaints count double)
-    weight = Column(Integer, default=1)
+    weight = Column(SmallInteger, default=1)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue())
     
     # Relationships
     complainant = relationship("User", foreign_keys=[complainant_id])
@@ -123,11 +210,14 @@ class Complaint(Base):
         return f"<Complaint #{self.id}: {self.title}>"
 
 
+updated_at_trigger(Complaint.__table__)
+
+
 class Compliment(Base):
     """Compliment model."""
     __tablename__ = "compliments"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # Who gave the compliment
     giver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -142,7 +232,7 @@ class Compliment(Base):
     description = Column(Text)
     
     # Weight (VIP compliments count double)
-    weight = Column(Integer, default=1)
+    weight = Column(SmallInteger, default=1)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
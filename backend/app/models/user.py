@@ -1,16 +1,16 @@
 """
 User-related database models.
 """
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, Float, DateTime, ForeignKey, LargeBinary, CheckConstraint, FetchedValue
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
 
-from ..core.database import Base
+from ..core.database import Base, Money, StatusCode, code_check, enum_check, updated_at_trigger
 
 
-class UserType(enum.Enum):
+class UserType(str, enum.Enum):
     """User type enumeration."""
     VISITOR = "visitor"
     CUSTOMER = "customer"
@@ -20,7 +20,7 @@ class UserType(enum.Enum):
     MANAGER = "manager"
 
 
-class UserStatus(enum.Enum):
+class UserStatus(str, enum.Enum):
     """User status enumeration."""
     PENDING = "pending"  # Registration pending approval
     ACTIVE = "active"
@@ -29,22 +29,30 @@ class UserStatus(enum.Enum):
     DEACTIVATED = "deactivated"
 
 
+# Stored SMALLINT codes; append only, never renumber
+USER_STATUS_CODES = {"pending": 0, "active": 1, "suspended": 2, "blacklisted": 3, "deactivated": 4}
+
+
 class User(Base):
     """Base user model for all user types."""
     __tablename__ = "users"
+    __table_args__ = (
+        enum_check("user_type", UserType, "ck_user_type"),
+        code_check("status", USER_STATUS_CODES, "ck_user_status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    username = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    full_name = Column(String)
-    phone = Column(String)
+    email = Column(String(254), unique=True, index=True, nullable=False)
+    username = Column(String(50), unique=True, index=True, nullable=False)
+    hashed_password = Column(LargeBinary(128), nullable=False)  # encoded Argon2id (or legacy bcrypt) hash
+    full_name = Column(String(120))
+    phone = Column(String(20))
     
-    user_type = Column(Enum(UserType), nullable=False)
-    status = Column(Enum(UserStatus), default=UserStatus.PENDING)
+    user_type = Column(String(24), nullable=False, index=True)
+    status = Column(StatusCode(USER_STATUS_CODES), default=UserStatus.PENDING.value, nullable=False, index=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue())
     last_login = Column(DateTime(timezone=True))
     
     # Failed login tracking
@@ -54,9 +62,10 @@ class User(Base):
     # Relationships
     wallet = relationship("Wallet", back_populates="user", uselist=False)
     reputation = relationship("Reputation", back_populates="user", uselist=False)
-    chat_logs = relationship("ChatLog", back_populates="user")
-    forum_topics = relationship("ForumTopic", back_populates="author")
-    forum_posts = relationship("ForumPost", back_populates="author")
+    # Never traversed from User; fail fast instead of issuing hidden N+1 loads
+    chat_logs = relationship("ChatLog", back_populates="user", lazy="raise_on_sql", passive_deletes=True)
+    forum_topics = relationship("ForumTopic", back_populates="author", lazy="raise_on_sql", passive_deletes=True)
+    forum_posts = relationship("ForumPost", back_populates="author", lazy="raise_on_sql", passive_deletes=True)
     
     # Type specific relationships
     customer = relationship("Customer", back_populates="user", uselist=False)
@@ -65,7 +74,10 @@ class User(Base):
     manager = relationship("Manager", back_populates="user", uselist=False)
     
     def __repr__(self):
-        return f"<User {self.username} ({self.user_type.value})>"
+        return f"<User {self.username} ({self.user_type})>"
+
+
+updated_at_trigger(User.__table__)
 
 
 class Visitor(Base):
@@ -91,8 +103,8 @@ class Customer(Base):
     
     address = Column(String)
     total_orders = Column(Integer, default=0)
-    total_spent = Column(Float, default=0.0)
-    warnings_count = Column(Integer, default=0)
+    total_spent = Column(Money, default=0.0)
+    warnings_count = Column(SmallInteger, default=0)
     
     # VIP tracking
     is_vip = Column(Boolean, default=False)
@@ -101,6 +113,7 @@ class Customer(Base):
     
     user = relationship("User", back_populates="customer")
     orders = relationship("Order", back_populates="customer")
+    vip_record = relationship("VIPCustomer", back_populates="customer", uselist=False)
 
 
 class VIPCustomer(Base):
@@ -110,16 +123,19 @@ class VIPCustomer(Base):
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), unique=True)
     
-    vip_level = Column(Integer, default=1)
+    vip_level = Column(SmallInteger, default=1)
     free_deliveries_earned = Column(Integer, default=0)
     free_deliveries_used = Column(Integer, default=0)
     
-    customer = relationship("Customer", foreign_keys=[customer_id])
+    customer = relationship("Customer", back_populates="vip_record")
 
 
 class Chef(Base):
     """Extended information for chefs."""
     __tablename__ = "chefs"
+    __table_args__ = (
+        CheckConstraint("average_rating BETWEEN 0 AND 5", name="ck_chef_average_rating"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
@@ -132,11 +148,11 @@ class Chef(Base):
     total_orders_completed = Column(Integer, default=0)
     average_rating = Column(Float, default=0.0)
     
-    complaints_count = Column(Integer, default=0)
-    compliments_count = Column(Integer, default=0)
-    demotion_count = Column(Integer, default=0)
+    complaints_count = Column(SmallInteger, default=0)
+    compliments_count = Column(SmallInteger, default=0)
+    demotion_count = Column(SmallInteger, default=0)
     
-    salary = Column(Float, default=0.0)
+    salary = Column(Money, default=0.0)
     
     user = relationship("User", back_populates="chef")
     dishes = relationship("Dish", back_populates="chef")
@@ -145,6 +161,9 @@ class Chef(Base):
 class DeliveryPerson(Base):
     """Extended information for delivery personnel."""
     __tablename__ = "delivery_persons"
+    __table_args__ = (
+        CheckConstraint("average_rating BETWEEN 0 AND 5", name="ck_delivery_person_average_rating"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
@@ -155,13 +174,13 @@ class DeliveryPerson(Base):
     total_deliveries = Column(Integer, default=0)
     average_rating = Column(Float, default=0.0)
     
-    complaints_count = Column(Integer, default=0)
-    compliments_count = Column(Integer, default=0)
-    demotion_count = Column(Integer, default=0)
+    complaints_count = Column(SmallInteger, default=0)
+    compliments_count = Column(SmallInteger, default=0)
+    demotion_count = Column(SmallInteger, default=0)
     
     is_available = Column(Boolean, default=True)
     
-    salary = Column(Float, default=0.0) # Added salary field
+    salary = Column(Money, default=0.0) # Added salary field
     
     user = relationship("User", back_populates="delivery_person")
     bids = relationship("DeliveryBid", back_populates="delivery_person")
@@ -176,7 +195,7 @@ class Manager(Base):
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
     
     department = Column(String)
-    access_level = Column(Integer, default=1)
+    access_level = Column(SmallInteger, default=1)
     
     user = relationship("User", back_populates="manager")
 
@@ -1,15 +1,20 @@
 """
 Wallet and transaction-related database models.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, UniqueConstraint, FetchedValue
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 import enum
 
-from ..core.database import Base
+from ..core.database import Base, Money, StatusCode, code_check, enum_check, updated_at_trigger
 
+if TYPE_CHECKING:
+    from .order import Order
 
-class TransactionType(enum.Enum):
+
+class TransactionType(str, enum.Enum):
     """Transaction type enumeration."""
     DEPOSIT = "deposit"
     WITHDRAWAL = "withdrawal"
@@ -18,7 +23,7 @@ class TransactionType(enum.Enum):
     BONUS = "bonus"
 
 
-class TransactionStatus(enum.Enum):
+class TransactionStatus(str, enum.Enum):
     """Transaction status enumeration."""
     PENDING = "pending"
     SUCCESS = "success"
@@ -26,21 +31,28 @@ class TransactionStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+# Stored SMALLINT codes; append only, never renumber
+TRANSACTION_STATUS_CODES = {"pending": 0, "success": 1, "failed": 2, "cancelled": 3}
+
+
 class Wallet(Base):
     """Customer wallet model."""
     __tablename__ = "wallets"
+    __table_args__ = (
+        UniqueConstraint("user_id", name="uq_wallets_user"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
-    balance = Column(Float, default=0.0)
+    balance = Column(Money, default=0.0)
     
-    total_deposited = Column(Float, default=0.0)
-    total_spent = Column(Float, default=0.0)
-    total_refunded = Column(Float, default=0.0)
+    total_deposited = Column(Money, default=0.0)
+    total_spent = Column(Money, default=0.0)
+    total_refunded = Column(Money, default=0.0)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue())
     
     # Relationships
     user = relationship("User", back_populates="wallet")
@@ -50,32 +62,44 @@ class Wallet(Base):
         return f"<Wallet User {self.user_id}: ${self.balance:.2f}>"
 
 
+updated_at_trigger(Wallet.__table__)
+
+
 class Transaction(Base):
     """Transaction history model."""
     __tablename__ = "transactions"
+    __table_args__ = (
+        enum_check("transaction_type", TransactionType, "ck_transaction_type"),
+        code_check("status", TRANSACTION_STATUS_CODES, "ck_transaction_status"),
+        Index("ix_transactions_wallet_created", "wallet_id", "created_at"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=False)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    wallet_id: Mapped[int] = mapped_column(ForeignKey("wallets.id"))
+    order_id: Mapped[Optional[int]] = mapped_column(ForeignKey("orders.id"), index=True)
     
-    transaction_type = Column(Enum(TransactionType), nullable=False)
-    status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING)
+    transaction_type: Mapped[str] = mapped_column(String(24), index=True)
+    status: Mapped[str] = mapped_column(
+        StatusCode(TRANSACTION_STATUS_CODES), default=TransactionStatus.PENDING.value, index=True
+    )
     
-    amount = Column(Float, nullable=False)
-    balance_before = Column(Float)
-    balance_after = Column(Float)
+    amount: Mapped[float] = mapped_column(Money)
+    balance_before: Mapped[Optional[float]] = mapped_column(Money)
+    balance_after: Mapped[Optional[float]] = mapped_column(Money)
     
-    payment_method = Column(String)  # wallet, credit_card, etc.
-    reference_number = Column(String, unique=True)
+    payment_method: Mapped[Optional[str]] = mapped_column(String)  # wallet, credit_card, etc.
+    reference_number: Mapped[Optional[str]] = mapped_column(String(40), unique=True)
     
-    notes = Column(Text)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
     
     # Relationships
-    wallet = relationship("Wallet", back_populates="transactions")
-    order = relationship("Order", back_populates="transaction")
+    wallet: Mapped["Wallet"] = relationship(back_populates="transactions")
+    order: Mapped[Optional["Order"]] = relationship(back_populates="transaction")
     
     def __repr__(self):
-        return f"<Transaction {self.transaction_type.value}: ${self.amount:.2f}>"
+        return f"<Transaction {self.transaction_type}: ${self.amount:.2f}>"
 
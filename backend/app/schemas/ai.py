@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+from .base import ResponseModel, Tags
+
 
 class QuestionRequest(BaseModel):
     """Schema for asking a question."""
@@ -32,23 +34,20 @@ class KnowledgeBaseCreate(BaseModel):
     question: str = Field(..., min_length=1)
     answer: str = Field(..., min_length=1)
     category: Optional[str] = None
-    tags: Optional[str] = None
+    tags: Tags = Field(default_factory=list)
 
 
-class KnowledgeBaseResponse(BaseModel):
+class KnowledgeBaseResponse(ResponseModel):
     """Schema for KB entry response."""
     id: int
     question: str
     answer: str
     category: Optional[str] = None
-    tags: Optional[str] = None
+    tags: Tags = Field(default_factory=list)
     times_used: int
     average_rating: float
     is_flagged: bool
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 class MenuRecommendationRequest(BaseModel):
@@ -64,7 +63,7 @@ class AIRatingCreate(BaseModel):
     feedback: Optional[str] = Field(None, max_length=1000)
 
 
-class AIRatingResponse(BaseModel):
+class AIRatingResponse(ResponseModel):
     """Schema returned to frontend."""
     id: int
     chat_log_id: int
@@ -72,9 +71,6 @@ class AIRatingResponse(BaseModel):
     feedback: Optional[str]
     created_at: datetime
 
-    class Config:
-        from_attributes = True  # required for SQLAlchemy → Pydantic V2
-
 
 class AIRatingUpdate(BaseModel):
     rating: Optional[int] = Field(None, ge=0, le=5)
@@ -1,7 +1,7 @@
 """
 Authentication-related Pydantic schemas.
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
 
@@ -25,10 +25,10 @@ class LoginRequest(BaseModel):
 class RegisterRequest(BaseModel):
     """Registration request schema."""
     email: EmailStr
-    username: str
+    username: str = Field(..., max_length=50)
     password: str
-    full_name: Optional[str] = None
-    phone: Optional[str] = None
+    full_name: Optional[str] = Field(None, max_length=120)
+    phone: Optional[str] = Field(None, max_length=20)
     user_type: str = "customer"  # customer, chef, delivery
 
 
@@ -0,0 +1,28 @@
+"""
+Shared base classes for Pydantic schemas.
+"""
+from typing import Annotated, List
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict
+
+
+class ResponseModel(BaseModel):
+    """Base for read-only response schemas built from ORM objects."""
+    model_config = ConfigDict(
+        from_attributes=True,
+        extra="ignore",
+        populate_by_name=True,
+        frozen=True,
+    )
+
+
+def _as_tag_list(value):
+    """Accept a list of tags or the older comma-separated string form."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [tag.strip() for tag in value if tag and tag.strip()]
+
+
+Tags = Annotated[List[str], BeforeValidator(_as_tag_list)]
@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+from .base import ResponseModel
+
 
 class DeliveryBidCreate(BaseModel):
     """Schema for placing a delivery bid."""
@@ -13,7 +15,7 @@ class DeliveryBidCreate(BaseModel):
     notes: Optional[str] = None
 
 
-class DeliveryBidResponse(BaseModel):
+class DeliveryBidResponse(ResponseModel):
     """Schema for delivery bid response."""
     id: int
     delivery_id: int
@@ -23,12 +25,9 @@ class DeliveryBidResponse(BaseModel):
     estimated_time: int
     notes: Optional[str] = None
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
-class DeliveryResponse(BaseModel):
+class DeliveryResponse(ResponseModel):
     """Schema for delivery response."""
     id: int
     order_id: int
@@ -45,9 +44,6 @@ class DeliveryResponse(BaseModel):
     actual_delivery_time: Optional[datetime] = None
     manager_justification: Optional[str] = None
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 class DeliveryAssignment(BaseModel):
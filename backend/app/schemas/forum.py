@@ -1,17 +1,19 @@
 """
 Forum-related Pydantic schemas.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+from .base import ResponseModel
+
 
 class ForumPostCreate(BaseModel):
     """Schema for creating a forum post."""
     content: str
 
 
-class ForumPostResponse(BaseModel):
+class ForumPostResponse(ResponseModel):
     """Schema for forum post response."""
     id: int
     topic_id: int
@@ -19,9 +21,6 @@ class ForumPostResponse(BaseModel):
     author_name: str
     content: str
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 class ForumTopicCreate(BaseModel):
@@ -31,7 +30,7 @@ class ForumTopicCreate(BaseModel):
     category: Optional[str] = "General"
 
 
-class ForumTopicResponse(BaseModel):
+class ForumTopicResponse(ResponseModel):
     """Schema for forum topic response."""
     id: int
     title: str
@@ -42,12 +41,9 @@ class ForumTopicResponse(BaseModel):
     view_count: int
     created_at: datetime
     reply_count: int = 0
-    
-    class Config:
-        from_attributes = True
 
 
 class ForumTopicDetail(ForumTopicResponse):
     """Schema for detailed forum topic response (including posts)."""
-    posts: List[ForumPostResponse] = []
+    posts: List[ForumPostResponse] = Field(default_factory=list)
 
@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+from .base import ResponseModel, Tags
+
 
 class DishCreate(BaseModel):
     """Schema for creating a dish."""
@@ -13,7 +15,7 @@ class DishCreate(BaseModel):
     price: float = Field(gt=0)
     category_id: Optional[int] = None
     image_url: Optional[str] = None
-    tags: Optional[str] = None  # comma-separated
+    tags: Tags = Field(default_factory=list)
     is_special: bool = False  # VIP only
 
 
@@ -24,10 +26,10 @@ class DishUpdate(BaseModel):
     price: Optional[float] = Field(None, gt=0)
     is_available: Optional[bool] = None
     is_special: Optional[bool] = None
-    tags: Optional[str] = None
+    tags: Optional[Tags] = None
 
 
-class DishResponse(BaseModel):
+class DishResponse(ResponseModel):
     """Schema for dish response."""
     id: int
     chef_id: int
@@ -37,13 +39,10 @@ class DishResponse(BaseModel):
     image_url: Optional[str] = None
     is_available: bool
     is_special: bool
-    tags: Optional[str] = None
+    tags: Tags = Field(default_factory=list)
     times_ordered: int
     average_rating: float
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 class DishCategoryCreate(BaseModel):
@@ -52,14 +51,11 @@ class DishCategoryCreate(BaseModel):
     description: Optional[str] = None
 
 
-class DishCategoryResponse(BaseModel):
+class DishCategoryResponse(ResponseModel):
     """Schema for category response."""
     id: int
     name: str
     description: Optional[str] = None
-    
-    class Config:
-        from_attributes = True
 
 
 class MenuSearchRequest(BaseModel):
@@ -68,7 +64,7 @@ class MenuSearchRequest(BaseModel):
     category_id: Optional[int] = None
     min_price: Optional[float] = None
     max_price: Optional[float] = None
-    tags: Optional[str] = None
+    tags: Optional[Tags] = None
     chef_id: Optional[int] = None
     include_special: bool = False  # VIP dishes
 
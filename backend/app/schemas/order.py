@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+from .base import ResponseModel
+
 
 class CartItemCreate(BaseModel):
     """Schema for adding item to cart."""
@@ -20,7 +22,7 @@ class OrderCreate(BaseModel):
     delivery_instructions: Optional[str] = None
 
 
-class OrderItemResponse(BaseModel):
+class OrderItemResponse(ResponseModel):
     """Schema for order item response."""
     id: int
     dish_id: int
@@ -30,12 +32,9 @@ class OrderItemResponse(BaseModel):
     unit_price: float
     total_price: float
     special_instructions: Optional[str] = None
-    
-    class Config:
-        from_attributes = True
 
 
-class OrderResponse(BaseModel):
+class OrderResponse(ResponseModel):
     """Schema for order response."""
     id: int
     order_number: str
@@ -52,10 +51,7 @@ class OrderResponse(BaseModel):
     delivery_rating: Optional[float] = None
     delivery_person_id: Optional[int] = None  # For complaints/compliments
     created_at: datetime
-    items: List[OrderItemResponse] = []
-    
-    class Config:
-        from_attributes = True
+    items: List[OrderItemResponse] = Field(default_factory=list)
 
 
 class OrderRating(BaseModel):
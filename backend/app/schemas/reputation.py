@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+from .base import ResponseModel
+
 
 class ComplaintCreate(BaseModel):
     """Schema for filing a complaint."""
@@ -14,7 +16,7 @@ class ComplaintCreate(BaseModel):
     order_id: Optional[int] = None
 
 
-class ComplaintResponse(BaseModel):
+class ComplaintResponse(ResponseModel):
     """Schema for complaint response."""
     id: int
     complainant_id: int
@@ -27,9 +29,6 @@ class ComplaintResponse(BaseModel):
     manager_decision: Optional[str] = None
     weight: int
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 class ComplaintDispute(BaseModel):
@@ -45,7 +44,7 @@ class ComplimentCreate(BaseModel):
     order_id: Optional[int] = None
 
 
-class ComplimentResponse(BaseModel):
+class ComplimentResponse(ResponseModel):
     """Schema for compliment response."""
     id: int
     giver_id: int
@@ -54,21 +53,15 @@ class ComplimentResponse(BaseModel):
     description: Optional[str] = None
     weight: int
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
-class ReputationResponse(BaseModel):
+class ReputationResponse(ResponseModel):
     """Schema for reputation response."""
     user_id: int
     score: int
     total_complaints: int
     total_compliments: int
     total_warnings: int
-    
-    class Config:
-        from_attributes = True
 
 
 class ManagerComplaintDecision(BaseModel):
@@ -5,13 +5,15 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
+from .base import ResponseModel
+
 
 class UserBase(BaseModel):
     """Base user schema."""
     email: EmailStr
     username: str = Field(..., min_length=3, max_length=50)
-    full_name: Optional[str] = None
-    phone: Optional[str] = None
+    full_name: Optional[str] = Field(None, max_length=120)
+    phone: Optional[str] = Field(None, max_length=20)
 
 
 class UserCreate(UserBase):
@@ -19,16 +21,13 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=8, max_length=100)
 
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, ResponseModel):
     """Schema for user response."""
     id: int
     user_type: str
     status: str
     created_at: datetime
     is_vip: Optional[bool] = False
-    
-    class Config:
-        from_attributes = True
 
 
 class CustomerResponse(UserResponse):
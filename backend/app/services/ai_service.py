@@ -2,15 +2,51 @@
 AI Service - Handles AI-powered Q&A and menu recommendations.
 Based on pseudocode sections 4.4 and 4.5 from the design document.
 """
-from typing import Optional, List, Tuple, Dict
+from typing import Optional, List, Set, Tuple, Dict
+from sqlalchemy import Float, case, cast, func, literal_column, select, update
 from sqlalchemy.orm import Session
 from datetime import datetime
+from collections import Counter
+import math
 import re
 
-from ..models.ai import KnowledgeBase, ChatLog, QuestionRating
+from ..models.ai import KnowledgeBase, ChatLog, QuestionRating, kb_question_tsv
 from ..models.menu import Dish
-from ..models.order import Order
+from ..models.order import Order, OrderItem
 from ..core.config import settings
+from ..core.database import count_tags, has_tag
+from . import embeddings
+
+
+# Full-text matches handed to the keyword scorer on PostgreSQL
+KB_SHORTLIST_SIZE = 10
+
+# Simple time-based matching: time_of_day -> (dish tag, score bonus)
+TIME_OF_DAY_TAGS = {
+    'morning': ('breakfast', 15),
+    'lunch': ('lunch', 15),
+    'dinner': ('dinner', 15),
+    'night': ('dessert', 10),
+}
+
+# Tokenizer for knowledge base keyword matching
+_WORD_RE = re.compile(r'\w+')
+
+# (id, lowercased question, question words) as scored by _search_knowledge_base
+KBCandidate = Tuple[int, str, Set[str]]
+
+# Process-local [fingerprint, entries] for knowledge base scans
+_kb_cache: list = [None, []]
+
+
+def _kb_candidate(entry_id: int, question: str) -> KBCandidate:
+    question_lower = question.lower()
+    return entry_id, question_lower, set(_WORD_RE.findall(question_lower))
+
+
+def invalidate_kb_cache() -> None:
+    """Force the next knowledge base scan in this process to reload."""
+    _kb_cache[0] = None
 
 
 class AIEngine:
@@ -25,7 +61,7 @@ class AIEngine:
         question_text: str,
         session_id: Optional[str] = None,
         ip_address: Optional[str] = None
-    ) -> Tuple[str, str, Optional[int]]:
+    ) -> Tuple[str, str, Optional[int], int]:
         """
         Answer user questions via chat.
         First try the local knowledge base, if not found use external LLM.
@@ -37,7 +73,7 @@ class AIEngine:
             ip_address: IP address of the requester
         
         Returns:
-            Tuple of (answer: str, source: str, kb_id: Optional[int])
+            Tuple of (answer: str, source: str, kb_id: Optional[int], chat_log_id: int)
         """
         # Save the question in chat log (for history and analytics)
         # We'll create the log first and update it with the answer
@@ -51,8 +87,16 @@ class AIEngine:
             source = "local_kb"
             kb_id = kb_answer.id
             
-            # Update KB usage stats
-            kb_answer.times_used += 1
+            # Update KB usage stats; a usage bump is not an edit, so keep
+            # updated_at (and with it the KB cache fingerprint) unchanged
+            self.db.execute(
+                update(KnowledgeBase)
+                .where(KnowledgeBase.id == kb_id)
+                .values(
+                    times_used=KnowledgeBase.times_used + 1,
+                    updated_at=KnowledgeBase.updated_at
+                )
+            )
             
             # Create chat log
             chat_log = ChatLog(
@@ -65,13 +109,15 @@ class AIEngine:
                 ip_address=ip_address
             )
             self.db.add(chat_log)
+            self.db.flush()
+            chat_log_id = chat_log.id
             self.db.commit()
             
             # Display kbAnswer to user
             # Note: Rating is prompted by the frontend
             # If rating is very low (0 or 1), it will be flagged via rate_answer method
             
-            return answer_text, source, kb_id
+            return answer_text, source, kb_id, chat_log_id
         
         else:
             # No local answer found
@@ -91,9 +137,11 @@ class AIEngine:
                 ip_address=ip_address
             )
             self.db.add(chat_log)
+            self.db.flush()
+            chat_log_id = chat_log.id
             self.db.commit()
             
-            return answer_text, source, None
+            return answer_text, source, None, chat_log_id
     
     def rate_answer(
         self,
@@ -141,24 +189,26 @@ class AIEngine:
         )
         self.db.add(question_rating)
         
-        # Update KB entry statistics
-        kb_entry = self.db.query(KnowledgeBase).filter(
-            KnowledgeBase.id == chat_log.knowledge_base_id
-        ).first()
-        
-        if kb_entry:
-            # Recalculate average rating
-            total_rating = kb_entry.average_rating * kb_entry.total_ratings
-            kb_entry.total_ratings += 1
-            kb_entry.average_rating = (total_rating + rating) / kb_entry.total_ratings
-            
-            # If rating is very low (0 or 1), flag for manager review
-            if rating <= 1:
-                kb_entry.is_flagged = True
-                kb_entry.flag_count += 1
-                # TODO: Notify manager for review
+        # Update KB entry statistics in one statement: running average, and
+        # if rating is very low (0 or 1), flag for manager review
+        is_low = rating <= 1
+        self.db.execute(
+            update(KnowledgeBase)
+            .where(KnowledgeBase.id == chat_log.knowledge_base_id)
+            .values(
+                average_rating=(
+                    KnowledgeBase.average_rating * KnowledgeBase.total_ratings + rating
+                ) / (KnowledgeBase.total_ratings + 1),
+                total_ratings=KnowledgeBase.total_ratings + 1,
+                is_flagged=True if is_low else KnowledgeBase.is_flagged,
+                flag_count=KnowledgeBase.flag_count + (1 if is_low else 0)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # TODO: Notify manager for review when flagged
         
         self.db.commit()
+        invalidate_kb_cache()
         
         return True, "Rating submitted successfully"
     
@@ -177,70 +227,47 @@ class AIEngine:
         Returns:
             List of recommended dishes
         """
-        # Get all dishes that are currently available
-        available_dishes = self.db.query(Dish).filter(Dish.is_available == True).all()
-        
         favorite_tags = []
         
         # If userId exists / user is logged in
         if user_id:
-            # Load past orders of this user
-            past_orders = self.db.query(Order).filter(
-                Order.customer_id == user_id
-            ).limit(20).all()
+            # Tags of every dish in the user's past orders, one row per dish
+            # with how many order lines it appeared on
+            past_orders = select(Order.id).where(Order.customer_id == user_id).limit(20)
+            dish_counts = self.db.query(Dish.tags, func.count(OrderItem.id)).join(
+                OrderItem, OrderItem.dish_id == Dish.id
+            ).filter(
+                OrderItem.order_id.in_(past_orders)
+            ).group_by(Dish.id).all()
             
             # Extract favorite tags or categories
-            tag_frequency = {}
-            for order in past_orders:
-                for item in order.items:
-                    if item.dish.tags:
-                        tags = [t.strip() for t in item.dish.tags.split(',')]
-                        for tag in tags:
-                            tag_frequency[tag] = tag_frequency.get(tag, 0) + 1
+            tag_frequency = Counter()
+            for tags, count in dish_counts:
+                for tag in set(tags or ()):
+                    tag_frequency[tag] += count
             
             # Get top tags
-            if tag_frequency:
-                sorted_tags = sorted(tag_frequency.items(), key=lambda x: x[1], reverse=True)
-                favorite_tags = [tag for tag, _ in sorted_tags[:5]]
+            favorite_tags = [tag for tag, _ in tag_frequency.most_common(5)]
         
-        # Calculate scores for each dish
-        scored_dishes = []
+        # Score every available dish in SQL:
+        # popularity + 10 per favorite tag + a time-of-day bonus
+        bind = self.db.get_bind()
+        score = Dish.times_ordered * 1.0 + Dish.average_rating * 10.0
         
-        for dish in available_dishes:
-            # Start with popularity score
-            score = dish.times_ordered * 1.0 + dish.average_rating * 10.0
-            
-            # If dish.tags overlap with favoriteTags → bonus
-            if dish.tags and favorite_tags:
-                dish_tags = [t.strip() for t in dish.tags.split(',')]
-                overlap = set(dish_tags) & set(favorite_tags)
-                if overlap:
-                    score += 10 * len(overlap)
-            
-            # If dish fits current time of day from context
-            if context and 'time_of_day' in context:
-                time_of_day = context['time_of_day']
-                if dish.tags:
-                    dish_tags = [t.strip().lower() for t in dish.tags.split(',')]
-                    
-                    # Simple time-based matching
-                    if time_of_day == 'morning' and 'breakfast' in dish_tags:
-                        score += 15
-                    elif time_of_day == 'lunch' and 'lunch' in dish_tags:
-                        score += 15
-                    elif time_of_day == 'dinner' and 'dinner' in dish_tags:
-                        score += 15
-                    elif time_of_day == 'night' and 'dessert' in dish_tags:
-                        score += 10
-            
-            scored_dishes.append((dish, score))
+        # If dish.tags overlap with favoriteTags → bonus
+        if favorite_tags:
+            score = score + count_tags(bind, Dish.tags, favorite_tags) * 10
         
-        # Sort all dishes by score from highest to lowest
-        scored_dishes.sort(key=lambda x: x[1], reverse=True)
+        # If dish fits current time of day from context
+        if context and context.get('time_of_day') in TIME_OF_DAY_TAGS:
+            tag, bonus = TIME_OF_DAY_TAGS[context['time_of_day']]
+            score = score + case((has_tag(bind, Dish.tags, tag, ignore_case=True), bonus), else_=0)
         
-        # Take top N dishes (for example N = 10)
+        # Take top N dishes (for example N = 10) by score, highest first
         top_n = 10
-        recommendations = [dish for dish, score in scored_dishes[:top_n]]
+        recommendations = self.db.query(Dish).filter(
+            Dish.is_available == True
+        ).order_by(score.desc(), Dish.id).limit(top_n).all()
         
         return recommendations
     
@@ -251,30 +278,29 @@ class AIEngine:
         """
         # Clean and normalize question
         question_lower = question.lower().strip()
+        question_words = set(_WORD_RE.findall(question_lower))
         
-        # Try exact match first
-        kb_entries = self.db.query(KnowledgeBase).filter(
+        # Exact match gets highest score; answer it from the index
+        exact_match = self.db.query(KnowledgeBase).filter(
+            func.lower(KnowledgeBase.question) == question_lower,
             KnowledgeBase.is_flagged == False
-        ).all()
+        ).first()
+        if exact_match:
+            return exact_match
         
         # Simple keyword matching
-        best_match = None
+        best_id = None
         best_score = 0
         
-        for entry in kb_entries:
-            entry_question_lower = entry.question.lower()
-            
+        for entry_id, entry_question_lower, entry_words in self._kb_candidates(question_lower):
             # Calculate simple similarity score
             score = 0
             
             # Exact match gets highest score
             if question_lower == entry_question_lower:
-                return entry
+                return self.db.get(KnowledgeBase, entry_id)
             
             # Check word overlap
-            question_words = set(re.findall(r'\w+', question_lower))
-            entry_words = set(re.findall(r'\w+', entry_question_lower))
-            
             common_words = question_words & entry_words
             score = len(common_words) / max(len(question_words), len(entry_words))
             
@@ -284,10 +310,95 @@ class AIEngine:
             
             if score > best_score and score > 0.3:  # Threshold
                 best_score = score
-                best_match = entry
+                best_id = entry_id
+        
+        best_match = self.db.get(KnowledgeBase, best_id) if best_id is not None else None
+        
+        # No keyword match: try a paraphrase match on question embeddings
+        if best_match is None:
+            best_match = self._semantic_match(question)
         
         return best_match
     
+    def _semantic_match(self, question: str) -> Optional[KnowledgeBase]:
+        """
+        Nearest knowledge base entry by question embedding, if close enough.
+        
+        Needs pgvector (PostgreSQL) and an embedding model; returns None otherwise.
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return None
+        
+        question_embedding = embeddings.encode(question)
+        if question_embedding is None:
+            return None
+        
+        # Embeddings are unit length, so L2 distance maps directly to cosine similarity
+        distance = KnowledgeBase.embedding.op("<->", return_type=Float)(
+            cast(question_embedding, KnowledgeBase.embedding.type)
+        )
+        max_distance = math.sqrt(2 * (1 - settings.KB_SEMANTIC_MIN_SIMILARITY))
+        
+        row = self.db.query(KnowledgeBase, distance).filter(
+            KnowledgeBase.is_flagged == False,
+            KnowledgeBase.embedding.isnot(None)
+        ).order_by(distance).first()
+        
+        if row and row[1] <= max_distance:
+            return row[0]
+        return None
+    
+    def _kb_candidates(self, question_lower: str) -> List[KBCandidate]:
+        """
+        Knowledge base entries worth scoring for a question.
+        
+        On PostgreSQL this is a ranked full-text shortlist served by the GIN
+        index (any shared word stem matches); elsewhere every unflagged entry,
+        served from the process-local cache.
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return self._cached_kb_entries()
+        
+        words = _WORD_RE.findall(question_lower)
+        if not words:
+            return []
+        
+        ts_query = func.to_tsquery(literal_column("'english'::regconfig"), " | ".join(words))
+        rows = self.db.query(KnowledgeBase.id, KnowledgeBase.question).filter(
+            KnowledgeBase.is_flagged == False,
+            kb_question_tsv.op("@@")(ts_query)
+        ).order_by(
+            func.ts_rank(kb_question_tsv, ts_query).desc()
+        ).limit(KB_SHORTLIST_SIZE).all()
+        return [_kb_candidate(entry_id, entry_question) for entry_id, entry_question in rows]
+    
+    def _cached_kb_entries(self) -> List[KBCandidate]:
+        """
+        All unflagged entries, reloaded only when the table has changed.
+        
+        Writes made through this process call invalidate_kb_cache(). The
+        fingerprint (row count, max id, max updated_at) costs one aggregate
+        query and is only the fallback for writes from other workers; it
+        misses a second edit within the same updated_at tick (one second
+        on SQLite), so such edits can stay stale there until the next change.
+        """
+        fingerprint = tuple(self.db.query(
+            func.count(KnowledgeBase.id),
+            func.max(KnowledgeBase.id),
+            func.max(KnowledgeBase.updated_at)
+        ).one())
+        
+        cached_fingerprint, entries = _kb_cache
+        if cached_fingerprint == fingerprint:
+            return entries
+        
+        rows = self.db.query(KnowledgeBase.id, KnowledgeBase.question).filter(
+            KnowledgeBase.is_flagged == False
+        ).all()
+        entries = [_kb_candidate(entry_id, entry_question) for entry_id, entry_question in rows]
+        _kb_cache[:] = [fingerprint, entries]
+        return entries
+    
     def _query_llm(self, question: str) -> str:
         """
         Query external LLM service.
@@ -308,7 +419,8 @@ class AIEngine:
         question: str,
         answer: str,
         category: Optional[str] = None,
-        tags: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        embedding: Optional[List[float]] = None,
         created_by: Optional[int] = None
     ) -> Tuple[bool, str, Optional[int]]:
         """
@@ -318,7 +430,9 @@ class AIEngine:
             question: The question
             answer: The answer
             category: Category of the question
-            tags: Comma-separated tags
+            tags: List of tags
+            embedding: Question embedding from embeddings.encode, computed by
+                the caller off the event loop (None stores no embedding)
             created_by: Manager ID who created this
         
         Returns:
@@ -328,12 +442,14 @@ class AIEngine:
             question=question,
             answer=answer,
             category=category,
-            tags=tags,
+            tags=tags or [],
+            embedding=embedding,
             created_by=created_by
         )
         
         self.db.add(kb_entry)
         self.db.commit()
+        invalidate_kb_cache()
         
         return True, "Knowledge entry added successfully", kb_entry.id
 
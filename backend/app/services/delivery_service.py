@@ -3,12 +3,14 @@ Delivery Service - Handles delivery assignment and bidding.
 Based on pseudocode section 4.3 from the design document.
 """
 from typing import Optional, Tuple, List
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timedelta
 
+from ..core.database import insert_or_ignore
 from ..models.delivery import Delivery, DeliveryBid, DeliveryStatus, BidStatus, AssignmentType
 from ..models.order import Order, OrderStatus
-from ..models.user import DeliveryPerson, Manager
+from ..models.user import Manager
 
 
 class DeliveryService:
@@ -34,26 +36,41 @@ class DeliveryService:
         Returns:
             Tuple of (success: bool, message: str, delivery_person_id: Optional[int])
         """
-        # Load order by orderId
-        order = self.db.query(Order).filter(Order.id == order_id).first()
-        
-        # If order not found → Error
-        if not order:
-            return False, "Order not found", None
+        # Load and lock the delivery with its order up front, so concurrent
+        # assignments of the same order are serialized until commit
+        delivery = self.db.query(Delivery).options(
+            joinedload(Delivery.order, innerjoin=True)
+        ).filter(
+            Delivery.order_id == order_id
+        ).with_for_update().populate_existing().first()
         
-        # Get or create delivery record
-        delivery = self.db.query(Delivery).filter(Delivery.order_id == order_id).first()
         if not delivery:
+            # If order not found → Error
+            if not self.db.query(Order.id).filter(Order.id == order_id).first():
+                return False, "Order not found", None
             return False, "Delivery record not found", None
         
-        # Load all bids for this order
-        bids = self.db.query(DeliveryBid).filter(
+        # Already assigned (e.g. by a concurrent request) → nothing to do
+        if delivery.status not in (DeliveryStatus.PENDING_BIDDING, DeliveryStatus.NO_BIDDERS):
+            return False, "Delivery has already been assigned", delivery.delivery_person_id
+        
+        order = delivery.order
+        
+        # Pending bids for this order
+        pending_bids = self.db.query(DeliveryBid).options(
+            joinedload(DeliveryBid.delivery_person)
+        ).filter(
             DeliveryBid.delivery_id == delivery.id,
             DeliveryBid.status == BidStatus.PENDING
-        ).all()
+        )
+        
+        # Lowest bidAmount (tie: earlier timestamp first)
+        lowest_bid = pending_bids.order_by(
+            DeliveryBid.bid_amount, DeliveryBid.created_at
+        ).limit(1).first()
         
         # If no bids → Set status and notify manager
-        if len(bids) == 0:
+        if lowest_bid is None:
             delivery.status = DeliveryStatus.NO_BIDDERS
             order.status = OrderStatus.READY_FOR_DELIVERY  # Waiting for manual assignment
             self.db.commit()
@@ -62,22 +79,18 @@ class DeliveryService:
             
             return False, "No bids. Manager must assign manually", None
         
-        # Sort bids from lowest bidAmount to highest (tie: earlier timestamp first)
-        sorted_bids = sorted(bids, key=lambda b: (b.bid_amount, b.created_at))
-        lowest_bid = sorted_bids[0]
-        
         # Check if there is a manager override
         if manager_override_delivery_person_id is not None:
             # Check if override is not the lowest bid
-            override_bid = next(
-                (b for b in bids if b.delivery_person_id == manager_override_delivery_person_id),
-                None
-            )
+            override_bid = pending_bids.filter(
+                DeliveryBid.delivery_person_id == manager_override_delivery_person_id
+            ).first()
             
             if override_bid and override_bid.bid_amount > lowest_bid.bid_amount:
                 if not justification:
                     return False, "Choosing a higher bid requires a justification memo", None
             
+            chosen_bid = override_bid
             chosen_delivery_person_id = manager_override_delivery_person_id
             assignment_type = AssignmentType.MANAGER_OVERRIDE
             
@@ -85,28 +98,27 @@ class DeliveryService:
                 return False, "Manager override delivery person has no bid", None
             
             winning_bid_amount = override_bid.bid_amount
-            override_bid.status = BidStatus.ACCEPTED
-            
-            # Reject other bids
-            for bid in bids:
-                if bid.id != override_bid.id:
-                    bid.status = BidStatus.REJECTED
             
             # Save justification
             delivery.manager_justification = justification
         else:
             # Auto-assign to lowest bidder
+            chosen_bid = lowest_bid
             chosen_delivery_person_id = lowest_bid.delivery_person_id
             assignment_type = AssignmentType.AUTO_ASSIGN
             winning_bid_amount = lowest_bid.bid_amount
-            
-            # Mark winning bid as accepted
-            lowest_bid.status = BidStatus.ACCEPTED
-            
-            # Reject other bids
-            for bid in bids:
-                if bid.id != lowest_bid.id:
-                    bid.status = BidStatus.REJECTED
+        
+        # Mark winning bid as accepted and reject all other pending bids at once
+        chosen_bid.status = BidStatus.ACCEPTED
+        self.db.execute(
+            update(DeliveryBid)
+            .where(
+                DeliveryBid.delivery_id == delivery.id,
+                DeliveryBid.id != chosen_bid.id,
+                DeliveryBid.status == BidStatus.PENDING
+            )
+            .values(status=BidStatus.REJECTED)
+        )
         
         # Create/update delivery assignment record
         delivery.delivery_person_id = chosen_delivery_person_id
@@ -118,9 +130,7 @@ class DeliveryService:
         order.status = OrderStatus.ASSIGNED_FOR_DELIVERY
         
         # Update delivery person stats
-        delivery_person = self.db.query(DeliveryPerson).filter(
-            DeliveryPerson.id == chosen_delivery_person_id
-        ).first()
+        delivery_person = chosen_bid.delivery_person
         if delivery_person:
             delivery_person.is_available = False
         
@@ -153,16 +163,15 @@ class DeliveryService:
         Returns:
             Tuple of (success: bool, message: str, delivery_id: Optional[int])
         """
-        order = self.db.query(Order).filter(Order.id == order_id).first()
-        if not order:
+        if self.db.scalar(select(Order.id).where(Order.id == order_id)) is None:
             return False, "Order not found", None
         
         # Check if delivery already exists
-        existing_delivery = self.db.query(Delivery).filter(
-            Delivery.order_id == order_id
-        ).first()
-        if existing_delivery:
-            return False, "Delivery already exists for this order", existing_delivery.id
+        existing_delivery_id = self.db.scalar(
+            select(Delivery.id).where(Delivery.order_id == order_id)
+        )
+        if existing_delivery_id is not None:
+            return False, "Delivery already exists for this order", existing_delivery_id
         
         # Create delivery record
         delivery = Delivery(
@@ -209,26 +218,21 @@ class DeliveryService:
         if datetime.utcnow() > delivery.bidding_ends_at:
             return False, "Bidding period has ended"
         
-        # Check if delivery person already bid
-        existing_bid = self.db.query(DeliveryBid).filter(
-            DeliveryBid.delivery_id == delivery_id,
-            DeliveryBid.delivery_person_id == delivery_person_id
-        ).first()
-        
-        if existing_bid:
-            return False, "You have already placed a bid for this delivery"
-        
-        # Create bid
-        bid = DeliveryBid(
+        # Create bid; the unique (delivery, delivery person) constraint turns
+        # a second bid into a no-op instead of needing a read first
+        bid_id = self.db.execute(insert_or_ignore(
+            self.db.get_bind(), DeliveryBid, ["delivery_id", "delivery_person_id"],
             delivery_id=delivery_id,
             delivery_person_id=delivery_person_id,
             bid_amount=bid_amount,
             estimated_time=estimated_time,
             notes=notes,
             status=BidStatus.PENDING
-        )
+        )).scalar()
+        
+        if bid_id is None:
+            return False, "You have already placed a bid for this delivery"
         
-        self.db.add(bid)
         self.db.commit()
         
         return True, "Bid placed successfully"
@@ -239,7 +243,11 @@ class DeliveryService:
         new_status: DeliveryStatus
     ) -> Tuple[bool, str]:
         """Update delivery status."""
-        delivery = self.db.query(Delivery).filter(Delivery.id == delivery_id).first()
+        # Delivery, its order and its courier in one round trip
+        delivery = self.db.query(Delivery).options(
+            joinedload(Delivery.order, innerjoin=True),
+            joinedload(Delivery.delivery_person)
+        ).filter(Delivery.id == delivery_id).first()
         if not delivery:
             return False, "Delivery not found"
         
@@ -253,9 +261,7 @@ class DeliveryService:
             
             # Update delivery person availability
             if delivery.delivery_person_id:
-                delivery_person = self.db.query(DeliveryPerson).filter(
-                    DeliveryPerson.id == delivery.delivery_person_id
-                ).first()
+                delivery_person = delivery.delivery_person
                 if delivery_person:
                     delivery_person.is_available = True
                     delivery_person.total_deliveries += 1
@@ -0,0 +1,51 @@
+"""
+Sentence embeddings for semantic knowledge base search.
+
+The model is loaded lazily on first use and only when KB_EMBEDDING_MODEL is
+set and sentence-transformers is installed; otherwise, or if the model fails
+to load, encode() returns None and callers fall back to keyword matching.
+"""
+import threading
+from typing import List, Optional
+
+from ..core.config import settings
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Semantic search is optional
+    SentenceTransformer = None
+
+_model = None
+_model_lock = threading.Lock()
+# Set when loading failed, so requests fall back to keyword search instead
+# of retrying the load (or download) every time
+_load_failed = False
+
+
+def _get_model():
+    """Load the embedding model once per process, or None if disabled or unloadable."""
+    global _model, _load_failed
+    if _model is None and not _load_failed and settings.KB_EMBEDDING_MODEL and SentenceTransformer is not None:
+        with _model_lock:
+            if _model is None and not _load_failed:
+                try:
+                    _model = SentenceTransformer(settings.KB_EMBEDDING_MODEL)
+                except Exception as e:
+                    _load_failed = True
+                    print(f"⚠️  Embedding model {settings.KB_EMBEDDING_MODEL!r} failed to load ({e}); "
+                          f"knowledge base search is keyword-only")
+    return _model
+
+
+def warm_up() -> None:
+    """Load the model (and run one encode) ahead of the first request."""
+    if _get_model() is not None:
+        encode("warm up")
+
+
+def encode(text: str) -> Optional[List[float]]:
+    """Unit-length embedding of text, or None when embeddings are disabled."""
+    model = _get_model()
+    if model is None:
+        return None
+    return model.encode(text, normalize_embeddings=True).tolist()
@@ -3,19 +3,25 @@ Order Service - Handles order creation and management.
 Based on pseudocode section 4.1 from the design document.
 """
 from typing import List, Dict, Optional, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
 from datetime import datetime
-import uuid
 
 from ..models.order import Order, OrderItem, OrderStatus, PaymentStatus
 from ..models.menu import Dish
-from ..models.user import Customer
+from ..models.user import Customer, DeliveryPerson, VIPCustomer
 from ..models.wallet import Wallet
 from .payment_service import PaymentService
 from .reputation_service import ReputationService
 from ..core.config import settings
 
 
+# Fraction taken off a VIP's subtotal
+VIP_DISCOUNT_RATE = settings.VIP_DISCOUNT_PERCENTAGE / 100.0
+
+DEFAULT_DELIVERY_FEE = 5.0
+
+
 class OrderService:
     """Service for order operations."""
     
@@ -43,52 +49,64 @@ class OrderService:
         if not cart_items or len(cart_items) == 0:
             return False, "Cart is empty. Cannot create order", None
         
-        # Load customer by customerId
-        customer = self.db.query(Customer).filter(Customer.id == customer_id).first()
+        # Load and lock customer by customerId. The row lock serializes
+        # checkouts per customer (stats, VIP counters, free deliveries) until
+        # commit; orders from other customers proceed in parallel
+        customer = self.db.query(Customer).options(
+            joinedload(Customer.vip_record)
+        ).filter(
+            Customer.id == customer_id
+        ).with_for_update(of=Customer).populate_existing().first()
         if not customer:
             return False, "Customer not found", None
         
+        # Load every dish in the cart in one query
+        dish_ids = {item.get('dish_id') for item in cart_items}
+        dishes = {
+            dish.id: dish
+            for dish in self.db.query(Dish).filter(Dish.id.in_(dish_ids))
+        }
+        
         # Check each item in cart
-        unavailable_items = []
         available_items = []
         
         for item in cart_items:
             dish_id = item.get('dish_id')
             quantity = item.get('quantity', 1)
             
-            dish = self.db.query(Dish).filter(Dish.id == dish_id).first()
+            dish = dishes.get(dish_id)
             
-            # If dish missing OR dish unavailable → Mark unavailable
+            # If dish missing OR dish unavailable → Skip it
             if not dish or not dish.is_available:
-                unavailable_items.append(dish_id)
+                continue
             # If dish is VIP-only and customer is not VIP → Reject
             elif dish.is_special and not customer.is_vip:
                 return False, f"'{dish.name}' is a VIP-only item. Become a VIP to order this dish!", None
             else:
                 available_items.append({
                     'dish': dish,
-                    'quantity': quantity
+                    'quantity': quantity,
+                    'line_total': dish.price * quantity
                 })
         
         # If all items are unavailable → Error
-        if len(available_items) == 0:
+        if not available_items:
             return False, "All items unavailable. Order cancelled", None
         
         # Compute totalAmount
-        total_amount = sum(item['dish'].price * item['quantity'] for item in available_items)
+        total_amount = sum(item['line_total'] for item in available_items)
         
         # If customer is VIP → Apply 5% discount
         is_vip = customer.is_vip
         discount_amount = 0.0
-        delivery_fee = 5.0 # Default fee
+        delivery_fee = DEFAULT_DELIVERY_FEE
         is_free_delivery = False
         
         if is_vip:
-            discount_amount = total_amount * (settings.VIP_DISCOUNT_PERCENTAGE / 100.0)
+            discount_amount = total_amount * VIP_DISCOUNT_RATE
             
             # Check for free delivery
-            from ..models.user import VIPCustomer
-            vip_record = self.db.query(VIPCustomer).filter(VIPCustomer.customer_id == customer.id).first()
+            vip_record = customer.vip_record
             if vip_record and vip_record.free_deliveries_earned > vip_record.free_deliveries_used:
                 is_free_delivery = True
                 delivery_fee = 0.0
@@ -98,25 +116,25 @@ class OrderService:
         else:
             final_amount = total_amount + delivery_fee
         
-        # Load wallet for this customer
-        wallet = self.db.query(Wallet).filter(Wallet.user_id == customer.user_id).first()
-        if not wallet:
+        # Load wallet balance for this customer
+        balance = self.db.scalar(select(Wallet.balance).where(Wallet.user_id == customer.user_id))
+        if balance is None:
             return False, "Wallet not found", None
         
         # If wallet.balance < finalAmount → Insufficient funds
-        if wallet.balance < final_amount:
+        if balance < final_amount:
             # Record reputation event
             self.reputation_service.record_event(
                 user_id=customer.user_id,
                 event_type="INSUFFICIENT_FUNDS_ORDER_REJECTED",
-                details=f"Order amount: ${final_amount:.2f}, Balance: ${wallet.balance:.2f}"
+                details={"order_amount": round(final_amount, 2), "balance": round(balance, 2)}
             )
+            self.db.commit()
             return False, "Insufficient funds. Order rejected", None
         
         # Create order record with status = "PENDING_PAYMENT"
         order = Order(
             customer_id=customer_id,
-            order_number=self._generate_order_number(),
             status=OrderStatus.PENDING_PAYMENT,
             payment_status=PaymentStatus.PENDING,
             subtotal=total_amount,
@@ -130,22 +148,28 @@ class OrderService:
         self.db.add(order)
         self.db.flush()  # Get order ID
         
-        # Add order items
-        for item in available_items:
-            order_item = OrderItem(
+        # Derived from the ID, so unique by construction; written together
+        # with the status change below
+        order.order_number = self._generate_order_number(order.id)
+        
+        # Add order items; flushed together as one batched INSERT
+        self.db.add_all([
+            OrderItem(
                 order_id=order.id,
                 dish_id=item['dish'].id,
                 quantity=item['quantity'],
                 unit_price=item['dish'].price,
-                total_price=item['dish'].price * item['quantity']
+                total_price=item['line_total']
             )
-            self.db.add(order_item)
+            for item in available_items
+        ])
         
         # Call PaymentService.processPayment
         payment_success, payment_message = self.payment_service.process_payment(
             order_id=order.id,
             customer_id=customer_id,
-            amount=final_amount
+            amount=final_amount,
+            customer=customer
         )
         
         if payment_success:
@@ -153,25 +177,30 @@ class OrderService:
             order.status = OrderStatus.PLACED
             order.payment_status = PaymentStatus.PAID
             
-            # Update customer statistics
-            customer.total_orders += 1
-            customer.total_spent += final_amount
+            # Customer totals were updated by PaymentService.process_payment
             
             # Update VIP free delivery progress
             if customer.is_vip:
                 customer.vip_orders_count += 1
                 if customer.vip_orders_count % 3 == 0:
-                    from ..models.user import VIPCustomer
-                    vip_record = self.db.query(VIPCustomer).filter(VIPCustomer.customer_id == customer.id).first()
+                    vip_record = customer.vip_record
                     if not vip_record:
-                        vip_record = VIPCustomer(customer_id=customer.id)
-                        self.db.add(vip_record)
+                        vip_record = VIPCustomer(free_deliveries_earned=0, free_deliveries_used=0)
+                        customer.vip_record = vip_record
                     
                     vip_record.free_deliveries_earned += 1
             
-            # Update dish popularity
+            # Update dish popularity in one statement
+            ordered_quantities = {}
             for item in available_items:
-                item['dish'].times_ordered += item['quantity']
+                dish_id = item['dish'].id
+                ordered_quantities[dish_id] = ordered_quantities.get(dish_id, 0) + item['quantity']
+            self.db.execute(
+                update(Dish)
+                .where(Dish.id.in_(ordered_quantities))
+                .values(times_ordered=Dish.times_ordered + case(ordered_quantities, value=Dish.id))
+                .execution_options(synchronize_session=False)
+            )
             
             self.db.commit()
             
@@ -196,11 +225,11 @@ class OrderService:
         if not order:
             return False
         
+        # updated_at is set by the column's onupdate=func.now()
         order.status = new_status
-        order.updated_at = datetime.utcnow()
         
         if new_status == OrderStatus.COMPLETED:
-            order.completed_at = datetime.utcnow()
+            order.completed_at = func.now()
         
         self.db.commit()
         return True
@@ -213,28 +242,35 @@ class OrderService:
         item_ratings: Optional[List[dict]] = None
     ) -> Tuple[bool, str]:
         """Rate food quality and delivery separately."""
-        order = self.get_order(order_id)
+        # Everything rated below: items and the delivery
+        order = self.db.query(Order).options(
+            selectinload(Order.items),
+            joinedload(Order.delivery)
+        ).filter(Order.id == order_id).first()
         if not order:
             return False, "Order not found"
         
+        # New dish ratings, dish_id -> [sum of ratings, number of ratings]
+        dish_ratings = {}
+        
         # Handle individual item ratings
         if item_ratings:
+            items_by_id = {i.id: i for i in order.items}
             for rating_data in item_ratings:
                 item_id = rating_data.get('order_item_id')
                 rating_val = rating_data.get('rating')
                 
                 if item_id and rating_val:
                     # Find item
-                    item = next((i for i in order.items if i.id == item_id), None)
-                    if item:
+                    item = items_by_id.get(item_id)
+                    # Items already rated keep their first rating
+                    if item and item.rating is None:
                         item.rating = rating_val
                         
                         # Update dish stats
-                        dish = item.dish
-                        if dish:
-                            total_rating = dish.average_rating * dish.rating_count
-                            dish.rating_count += 1
-                            dish.average_rating = (total_rating + rating_val) / dish.rating_count
+                        totals = dish_ratings.setdefault(item.dish_id, [0.0, 0])
+                        totals[0] += rating_val
+                        totals[1] += 1
         
         # Fallback/Legacy: If overall food_rating is provided but no item ratings, 
         # apply it to all items? Or just keep it as overall order rating.
@@ -242,48 +278,78 @@ class OrderService:
         if food_rating is not None:
             if not (1 <= food_rating <= 5):
                 return False, "Food rating must be between 1 and 5"
-            order.food_rating = food_rating
+            if not self._set_rating_once(order_id, Order.food_rating, food_rating):
+                return False, "Order already rated"
             
             # Only update dishes if item_ratings wasn't provided (avoid double counting)
             if not item_ratings:
                 # Update dish ratings
                 for item in order.items:
-                    dish = item.dish
-                    # Recalculate average rating
-                    total_rating = dish.average_rating * dish.rating_count
-                    dish.rating_count += 1
-                    dish.average_rating = (total_rating + food_rating) / dish.rating_count
+                    totals = dish_ratings.setdefault(item.dish_id, [0.0, 0])
+                    totals[0] += food_rating
+                    totals[1] += 1
         
         if delivery_rating is not None:
             if not (1 <= delivery_rating <= 5):
                 return False, "Delivery rating must be between 1 and 5"
-            order.delivery_rating = delivery_rating
+            if not self._set_rating_once(order_id, Order.delivery_rating, delivery_rating):
+                return False, "Delivery already rated"
             
             # Update delivery person rating
-            if order.delivery and order.delivery.delivery_person:
-                driver = order.delivery.delivery_person
-                total_driver_rating = driver.average_rating * driver.total_deliveries # Approx
-                # A better way is to track rating count separately or just increment
-                # Since we don't have explicit rating_count for driver in schema (just total_deliveries),
-                # let's assume total_deliveries is close enough or use it as count
-                
-                # Actually driver.total_deliveries is incremented on delivery completion
-                # So we can use it as weight
-                
-                # Check if this order was already rated? 
-                # For simplicity, we just update the moving average
-                # New Average = Old Average + (New Rating - Old Average) / N
-                # But here we treat it as a new data point
-                
-                # Let's just do weighted average update
-                # Since we don't store rating_count separately, use total_deliveries
-                count = max(1, driver.total_deliveries)
-                driver.average_rating = ((driver.average_rating * count) + delivery_rating) / (count + 1)
+            if order.delivery and order.delivery.delivery_person_id:
+                # There is no separate rating count for drivers, so total_deliveries
+                # (incremented on completion) weights the running average:
+                # new = old + (rating - old) / (count + 1), applied atomically in SQL
+                count = case(
+                    (DeliveryPerson.total_deliveries > 1, DeliveryPerson.total_deliveries),
+                    else_=1
+                )
+                self.db.execute(
+                    update(DeliveryPerson)
+                    .where(DeliveryPerson.id == order.delivery.delivery_person_id)
+                    .values(
+                        average_rating=DeliveryPerson.average_rating
+                        + (float(delivery_rating) - DeliveryPerson.average_rating) / (count + 1)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+        
+        # Fold the new ratings into each dish's running average in SQL
+        if dish_ratings:
+            dishes = Dish.__table__
+            self.db.execute(
+                update(dishes)
+                .where(dishes.c.id == bindparam("dish_id"))
+                .values(
+                    average_rating=(
+                        dishes.c.average_rating * dishes.c.rating_count + bindparam("rating_sum")
+                    ) / (dishes.c.rating_count + bindparam("rating_n")),
+                    rating_count=dishes.c.rating_count + bindparam("rating_n")
+                ),
+                [
+                    {"dish_id": dish_id, "rating_sum": float(total), "rating_n": n}
+                    for dish_id, (total, n) in dish_ratings.items()
+                ]
+            )
         
         self.db.commit()
         return True, "Rating submitted successfully"
     
-    def _generate_order_number(self) -> str:
-        """Generate unique order number."""
-        return f"ORD-{datetime.utcnow().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
+    def _set_rating_once(self, order_id: int, column, value: float) -> bool:
+        """
+        Set an order rating column only if it is still NULL.
+        
+        Returns False when the order was already rated, so a replayed
+        request cannot count the rating towards dish or driver stats twice.
+        """
+        result = self.db.execute(
+            update(Order)
+            .where(Order.id == order_id, column.is_(None))
+            .values({column: value})
+        )
+        return result.rowcount == 1
+    
+    def _generate_order_number(self, order_id: int) -> str:
+        """Generate unique order number from the order's ID."""
+        return f"ORD-{datetime.utcnow():%Y%m%d}-{order_id:08X}"
 
@@ -2,14 +2,16 @@
 Payment Service - Handles wallet and payment processing.
 Based on pseudocode section 4.2 from the design document.
 """
-from typing import Tuple
+from typing import Optional, Tuple
+from sqlalchemy import exists, lambda_stmt, select, update
 from sqlalchemy.orm import Session
 from datetime import datetime
-import uuid
+import secrets
 
 from ..models.wallet import Wallet, Transaction, TransactionType, TransactionStatus
 from ..models.order import Order, PaymentStatus
 from ..models.user import Customer
+from ..core.database import insert_or_ignore
 
 
 class PaymentService:
@@ -18,64 +20,98 @@ class PaymentService:
     def __init__(self, db: Session):
         self.db = db
     
+    def _get_wallet(self, user_id: int) -> Optional[Wallet]:
+        """Load a user's wallet through a cached lambda statement."""
+        stmt = lambda_stmt(lambda: select(Wallet).where(Wallet.user_id == user_id))
+        return self.db.scalars(stmt).first()
+    
+    def _update_wallet(self, *criteria, **values):
+        """
+        Apply an atomic UPDATE to one wallet.
+        
+        Returns the wallet's (id, balance) after the update, or None when no
+        wallet matched criteria (e.g. a debit guard on the balance failed).
+        """
+        return self.db.execute(
+            update(Wallet)
+            .where(*criteria)
+            .values(**values)
+            .returning(Wallet.id, Wallet.balance)
+        ).first()
+    
     def process_payment(
         self, 
         order_id: int, 
         customer_id: int, 
-        amount: float
+        amount: float,
+        customer: Optional[Customer] = None
     ) -> Tuple[bool, str]:
         """
         Handle the payment for an order by checking and updating the user's wallet.
         
+        Changes are only staged in the session; the caller commits them
+        together with the rest of the order.
+        
         Args:
             order_id: ID of the order
             customer_id: ID of the customer
             amount: Amount to pay
+            customer: The customer, if the caller has already loaded it
         
         Returns:
             Tuple of (success: bool, message: str)
         """
         # Load customer to get user_id
-        customer = self.db.query(Customer).filter(Customer.id == customer_id).first()
+        if customer is None:
+            customer = self.db.query(Customer).filter(Customer.id == customer_id).first()
         if not customer:
             return False, "Customer not found"
         
-        # Load wallet by customerId (user_id)
-        wallet = self.db.query(Wallet).filter(Wallet.user_id == customer.user_id).first()
-        
-        # If no wallet found → Return FAILED
-        if not wallet:
-            return False, "Wallet not found"
+        # Deduct amount from wallet.balance, only if the balance covers it;
+        # check and debit are one statement so concurrent orders cannot overdraw
+        wallet = self._update_wallet(
+            Wallet.user_id == customer.user_id,
+            Wallet.balance >= amount,
+            balance=Wallet.balance - amount,
+            total_spent=Wallet.total_spent + amount
+        )
         
-        # If wallet.balance < amount → Insufficient funds
-        if wallet.balance < amount:
+        if wallet is None:
+            # If no wallet found → Return FAILED
+            if self.db.scalar(select(Wallet.id).where(Wallet.user_id == customer.user_id)) is None:
+                return False, "Wallet not found"
+            # Otherwise wallet.balance < amount → Insufficient funds
             # Note: ReputationService is called from OrderService to avoid circular import
             return False, "Insufficient wallet balance"
         
-        # Deduct amount from wallet.balance
-        balance_before = wallet.balance
-        wallet.balance -= amount
-        wallet.total_spent += amount
         balance_after = wallet.balance
+        balance_before = round(balance_after + amount, 2)
         
-        # Update Customer stats and check for VIP upgrade
+        # Update Customer stats (the single place they are counted) and check for VIP upgrade
         if customer:
-            customer.total_spent += amount
-            customer.total_orders += 1
+            stats = self.db.execute(
+                update(Customer)
+                .where(Customer.id == customer.id)
+                .values(
+                    total_orders=Customer.total_orders + 1,
+                    total_spent=Customer.total_spent + amount
+                )
+                .returning(Customer.total_orders, Customer.total_spent)
+            ).one()
             
             # VIP Upgrade Logic: > $100 spent OR >= 3 orders
             if not customer.is_vip:
-                if customer.total_spent > 100.0 or customer.total_orders >= 3:
+                if stats.total_spent > 100.0 or stats.total_orders >= 3:
                     # Check for outstanding complaints
                     # We need to access ReputationService, but need to be careful of circular imports
                     # For now, let's assume this check happens or we do a direct DB query
                     from ..models.reputation import Complaint, ComplaintStatus
-                    outstanding_complaints = self.db.query(Complaint).filter(
+                    has_outstanding_complaints = self.db.query(exists().where(
                         Complaint.subject_id == customer.user_id,
                         Complaint.status.in_([ComplaintStatus.PENDING, ComplaintStatus.UNDER_REVIEW])
-                    ).count()
+                    )).scalar()
                     
-                    if outstanding_complaints == 0:
+                    if not has_outstanding_complaints:
                         customer.is_vip = True
                         customer.vip_since = datetime.utcnow()
                         customer.vip_orders_count = 0 # Reset for free delivery tracking
@@ -95,13 +131,11 @@ class PaymentService:
         
         self.db.add(transaction)
         
-        # Update order paymentStatus → "PAID"
-        order = self.db.query(Order).filter(Order.id == order_id).first()
+        # Update order paymentStatus → "PAID" (identity map hit when the caller holds the order)
+        order = self.db.get(Order, order_id)
         if order:
             order.payment_status = PaymentStatus.PAID
         
-        self.db.commit()
-        
         # Return SUCCESS
         return True, "Payment completed"
     
@@ -125,18 +159,18 @@ class PaymentService:
         if amount <= 0:
             return False, "Deposit amount must be positive"
         
-        # Get or create wallet
-        wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
-        if not wallet:
-            wallet = Wallet(user_id=user_id, balance=0.0)
-            self.db.add(wallet)
-            self.db.flush()
-        
-        # Update balance
-        balance_before = wallet.balance
-        wallet.balance += amount
-        wallet.total_deposited += amount
+        # Update balance atomically, creating the wallet first if needed
+        credit = dict(
+            balance=Wallet.balance + amount,
+            total_deposited=Wallet.total_deposited + amount
+        )
+        wallet = self._update_wallet(Wallet.user_id == user_id, **credit)
+        if wallet is None:
+            self.db.execute(insert_or_ignore(self.db.get_bind(), Wallet, ["user_id"], user_id=user_id, balance=0.0))
+            wallet = self._update_wallet(Wallet.user_id == user_id, **credit)
+        
         balance_after = wallet.balance
+        balance_before = round(balance_after - amount, 2)
         
         # Create transaction record
         transaction = Transaction(
@@ -160,6 +194,8 @@ class PaymentService:
         """
         Refund an order amount back to the customer's wallet.
         
+        Changes are only staged in the session; the caller commits them.
+        
         Args:
             order_id: ID of the order to refund
         
@@ -175,14 +211,16 @@ class PaymentService:
         if not original_transaction:
             return False, "Original payment transaction not found"
         
-        wallet = original_transaction.wallet
         refund_amount = original_transaction.amount
         
-        # Update balance
-        balance_before = wallet.balance
-        wallet.balance += refund_amount
-        wallet.total_refunded += refund_amount
+        # Update balance atomically
+        wallet = self._update_wallet(
+            Wallet.id == original_transaction.wallet_id,
+            balance=Wallet.balance + refund_amount,
+            total_refunded=Wallet.total_refunded + refund_amount
+        )
         balance_after = wallet.balance
+        balance_before = round(balance_after - refund_amount, 2)
         
         # Create refund transaction
         refund_transaction = Transaction(
@@ -201,22 +239,20 @@ class PaymentService:
         self.db.add(refund_transaction)
         
         # Update order payment status
-        order = self.db.query(Order).filter(Order.id == order_id).first()
+        order = self.db.get(Order, order_id)
         if order:
             order.payment_status = PaymentStatus.REFUNDED
         
-        self.db.commit()
-        
         return True, f"Refunded ${refund_amount:.2f} to wallet"
     
     def get_wallet_balance(self, user_id: int) -> float:
         """Get current wallet balance for a user."""
-        wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
-        return wallet.balance if wallet else 0.0
+        balance = self.db.scalar(select(Wallet.balance).where(Wallet.user_id == user_id))
+        return balance if balance is not None else 0.0
     
     def get_transaction_history(self, user_id: int, limit: int = 50):
         """Get transaction history for a user."""
-        wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
+        wallet = self._get_wallet(user_id)
         if not wallet:
             return []
         
@@ -226,5 +262,5 @@ class PaymentService:
     
     def _generate_reference_number(self) -> str:
         """Generate unique transaction reference number."""
-        return f"TXN-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6].upper()}"
+        return f"TXN-{datetime.utcnow():%Y%m%d%H%M%S}-{secrets.token_hex(3).upper()}"
 
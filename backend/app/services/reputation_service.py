@@ -2,8 +2,10 @@
 Reputation Service - Handles user reputation tracking and management.
 Based on pseudocode section 4.6 from the design document.
 """
-from typing import Optional, Tuple
-from sqlalchemy.orm import Session
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from sqlalchemy import func, lambda_stmt, select, update
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 
 from ..models.reputation import (
@@ -15,8 +17,49 @@ from ..models.reputation import (
     ComplaintStatus
 )
 from ..models.user import User, UserStatus, UserType, Customer, Chef, DeliveryPerson
-from ..models.wallet import Wallet
 from ..core.config import settings
+from ..core.database import insert_or_ignore
+
+
+# Reputation and warning thresholds, read from settings once at import
+VIP_REPUTATION_THRESHOLD = settings.VIP_REPUTATION_THRESHOLD
+BLACKLIST_REPUTATION_THRESHOLD = settings.BLACKLIST_REPUTATION_THRESHOLD
+WARNING_THRESHOLD_DEREGISTER = settings.WARNING_THRESHOLD_DEREGISTER
+WARNING_THRESHOLD_VIP_DEMOTION = settings.WARNING_THRESHOLD_VIP_DEMOTION
+
+# Reputation score change per event type
+_SCORE_CHANGE = {
+    ReputationEventType.COMPLAINT: -10,
+    ReputationEventType.COMPLIMENT: +10,
+    ReputationEventType.WARNING: -20,
+    ReputationEventType.BONUS: +15,
+    ReputationEventType.DEMOTION: -25,
+    ReputationEventType.PROMOTION: +30,
+    ReputationEventType.ORDER_COMPLETED: +2,
+    ReputationEventType.ORDER_REJECTED: -5,
+    ReputationEventType.INSUFFICIENT_FUNDS: -3,
+    ReputationEventType.RATING_RECEIVED: 0,  # Calculated separately
+}
+
+
+# Records reputation rules touch, loaded together with the user
+_USER_RECORDS = [
+    joinedload(User.reputation),
+    joinedload(User.customer),
+    joinedload(User.chef),
+    joinedload(User.delivery_person),
+    joinedload(User.wallet),
+]
+
+
+@lru_cache(maxsize=32)
+def _parse_event_type(event_type: str) -> ReputationEventType:
+    """Map an event name to its enum member; unknown names count as a completed order."""
+    try:
+        return ReputationEventType[event_type.upper()]
+    except KeyError:
+        # If not a valid enum, use a generic one
+        return ReputationEventType.ORDER_COMPLETED
 
 
 class ReputationService:
@@ -25,7 +68,75 @@ class ReputationService:
     def __init__(self, db: Session):
         self.db = db
     
-    def check_staff_performance(self, user_id: int) -> None:
+    def _get_reputation(self, user_id: int) -> Optional[Reputation]:
+        """Load a user's reputation through a cached lambda statement."""
+        stmt = lambda_stmt(lambda: select(Reputation).where(Reputation.user_id == user_id))
+        return self.db.scalars(stmt).first()
+    
+    def _update_reputation(self, user_id: int, **values):
+        """
+        Apply an atomic UPDATE to a user's reputation.
+        
+        Returns the reputation's (id, score) after the update, or None when
+        the user has no reputation record yet.
+        """
+        return self.db.execute(
+            update(Reputation)
+            .where(Reputation.user_id == user_id)
+            .values(**values)
+            .returning(Reputation.id, Reputation.score)
+        ).first()
+    
+    def _reputation_id(self, user_id: int) -> int:
+        """Get the ID of a user's reputation record, creating it if needed."""
+        reputation_id = self.db.scalar(select(Reputation.id).where(Reputation.user_id == user_id))
+        if reputation_id is None:
+            reputation_id = self.db.scalar(
+                insert_or_ignore(self.db.get_bind(), Reputation, ["user_id"], user_id=user_id, score=0)
+            )
+            if reputation_id is None:
+                # Created concurrently
+                reputation_id = self.db.scalar(select(Reputation.id).where(Reputation.user_id == user_id))
+        return reputation_id
+    
+    def _log_event(
+        self,
+        reputation_id: int,
+        event_enum: ReputationEventType,
+        description: str,
+        score_change: int,
+        details: Optional[dict],
+        created_by: Optional[int]
+    ) -> None:
+        """Insert a new row into the reputation log."""
+        self.db.add(ReputationEvent(
+            reputation_id=reputation_id,
+            event_type=event_enum,
+            score_change=score_change,
+            description=description,
+            details=details,
+            created_by=created_by
+        ))
+    
+    def _load_user(self, user_id: int) -> Optional[User]:
+        """
+        Load a user with every record reputation rules touch.
+        
+        Goes through the identity map, so repeated calls while handling one
+        event cost no further queries.
+        """
+        return self.db.get(User, user_id, options=_USER_RECORDS)
+    
+    def _is_vip(self, user: Optional[User]) -> bool:
+        """True when the user's customer record is VIP."""
+        return bool(user and user.customer and user.customer.is_vip)
+    
+    def check_staff_performance(
+        self,
+        user_id: int,
+        user: Optional[User] = None,
+        reputation: Optional[Reputation] = None
+    ) -> None:
         """
         Evaluate staff performance and apply demotions/bonuses.
         
@@ -33,12 +144,18 @@ class ReputationService:
         - Low Rating (< 2.0) OR 3 complaints => Demotion (Lower Salary)
         - 2 Demotions => Fired (Deactivated)
         - High Rating (> 4.0) OR 3 compliments => Bonus
+        
+        user and reputation may be passed in when the caller has already
+        loaded them.
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            user = self._load_user(user_id)
         if not user or user.user_type not in [UserType.CHEF, UserType.DELIVERY]:
             return
 
-        reputation = self.db.query(Reputation).filter(Reputation.user_id == user_id).first()
+        if reputation is None:
+            # Not on the user yet when record_event has just created it
+            reputation = user.reputation or self._get_reputation(user_id)
         if not reputation:
             return
 
@@ -77,12 +194,12 @@ class ReputationService:
             # 2 Demotions => Fire
             if staff_record.demotion_count >= 2:
                 user.status = UserStatus.DEACTIVATED
-                self.record_event(user_id, "FIRED", "Fired due to 2nd demotion", skip_performance_check=True)
+                self.record_event(user_id, "FIRED", {"reason": "Fired due to 2nd demotion"}, skip_performance_check=True)
             else:
                 # 1st Demotion => Lower Salary
                 if staff_record.salary > 0:
                     staff_record.salary *= 0.9 # 10% cut
-                self.record_event(user_id, "DEMOTION", "Demoted due to poor performance", skip_performance_check=True)
+                self.record_event(user_id, "DEMOTION", {"reason": "Demoted due to poor performance"}, skip_performance_check=True)
             
             # Reset counters to give another chance (or valid for next cycle)
             staff_record.complaints_count = 0 
@@ -98,107 +215,96 @@ class ReputationService:
         if should_bonus:
             # Apply Bonus (Salary Increase or Cash Bonus?)
             # "receive a bonus" -> Let's give a one-time bonus to wallet AND small raise
-            wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
+            wallet = user.wallet
             if wallet:
                 wallet.balance += 50.0 # $50 bonus
                 
             staff_record.salary *= 1.05 # 5% raise
-            self.record_event(user_id, "BONUS", "Performance bonus awarded", skip_performance_check=True)
+            self.record_event(user_id, "BONUS", {"reason": "Performance bonus awarded"}, skip_performance_check=True)
             
             # Reset counters
             staff_record.compliments_count = 0
 
-        self.db.commit()
-
+    def _apply_score_thresholds(
+        self,
+        user: User,
+        event_enum: ReputationEventType,
+        new_score: int,
+        skip_performance_check: bool = False
+    ) -> None:
+        """Apply VIP, blacklist and staff performance rules after a score change."""
+        # Check VIP threshold
+        if new_score >= VIP_REPUTATION_THRESHOLD:
+            customer = user.customer
+            if customer and not customer.is_vip:
+                self._promote_to_vip(customer)
+        
+        # Check blacklist threshold
+        if new_score <= BLACKLIST_REPUTATION_THRESHOLD:
+            user.status = UserStatus.BLACKLISTED
+            # TODO: Notify security or manager
+        
+        # Check Staff Performance (skip if this is an internal event to prevent recursion)
+        if not skip_performance_check and user.user_type in [UserType.CHEF, UserType.DELIVERY]:
+            # Update staff specific counters
+            staff = user.chef if user.user_type == UserType.CHEF else user.delivery_person
+            if staff:
+                if event_enum == ReputationEventType.COMPLAINT:
+                    staff.complaints_count += 1
+                elif event_enum == ReputationEventType.COMPLIMENT:
+                    staff.compliments_count += 1
+            
+            self.check_staff_performance(user.id, user=user)
+    
     def record_event(
         self,
         user_id: int,
         event_type: str,
-        details: str = "",
+        details: Optional[dict] = None,
         created_by: Optional[int] = None,
         skip_performance_check: bool = False
     ) -> bool:
         """
         Record events that affect user reputation and update scores.
-        """
-        # ... (existing implementation) ...
-        # Get or create reputation record
-        reputation = self.db.query(Reputation).filter(
-            Reputation.user_id == user_id
-        ).first()
-        
-        if not reputation:
-            reputation = Reputation(user_id=user_id, score=0)
-            self.db.add(reputation)
-            self.db.flush()
         
+        Changes are only staged in the session; the caller commits them.
+        """
         # Convert string to enum
-        try:
-            event_enum = ReputationEventType[event_type.upper()]
-        except KeyError:
-            # If not a valid enum, use a generic one
-            event_enum = ReputationEventType.ORDER_COMPLETED
+        event_enum = _parse_event_type(event_type)
         
         # Use ReputationRuleEngine to compute scoreChange
         score_change = self._calculate_score_change(event_enum)
         
-        # Insert a new row into reputation log
-        event = ReputationEvent(
-            reputation_id=reputation.id,
-            event_type=event_enum,
-            score_change=score_change,
-            description=event_type,
-            details=details,
-            created_by=created_by
-        )
-        self.db.add(event)
-        
-        # Load current reputationScore
-        current_score = reputation.score
-        new_score = current_score + score_change
-        
-        # Save newScore back to database
-        reputation.score = new_score
-        reputation.updated_at = datetime.utcnow()
-        
-        # Update event counters
+        # Add scoreChange and bump the event counter in one statement,
+        # creating the reputation record first if needed
+        changes = {"score": Reputation.score + score_change}
         if event_enum == ReputationEventType.COMPLAINT:
-            reputation.total_complaints += 1
+            changes["total_complaints"] = Reputation.total_complaints + 1
         elif event_enum == ReputationEventType.COMPLIMENT:
-            reputation.total_compliments += 1
+            changes["total_compliments"] = Reputation.total_compliments + 1
         elif event_enum == ReputationEventType.WARNING:
-            reputation.total_warnings += 1
+            changes["total_warnings"] = Reputation.total_warnings + 1
+        
+        # Events that change nothing (e.g. RATING_RECEIVED) are only logged
+        if score_change == 0 and len(changes) == 1:
+            self._log_event(self._reputation_id(user_id), event_enum, event_type, score_change, details, created_by)
+            return True
+        
+        reputation = self._update_reputation(user_id, **changes)
+        if reputation is None:
+            self.db.execute(insert_or_ignore(self.db.get_bind(), Reputation, ["user_id"], user_id=user_id, score=0))
+            reputation = self._update_reputation(user_id, **changes)
+        new_score = reputation.score
         
-        # Get user
-        user = self.db.query(User).filter(User.id == user_id).first()
+        # Insert a new row into reputation log
+        self._log_event(reputation.id, event_enum, event_type, score_change, details, created_by)
+        
+        # Load the user together with reputation, customer and staff records
+        user = self._load_user(user_id)
         
         if user:
-            # Check VIP threshold
-            if new_score >= settings.VIP_REPUTATION_THRESHOLD:
-                customer = self.db.query(Customer).filter(
-                    Customer.user_id == user_id
-                ).first()
-                if customer and not customer.is_vip:
-                    self._promote_to_vip(customer)
-            
-            # Check blacklist threshold
-            if new_score <= settings.BLACKLIST_REPUTATION_THRESHOLD:
-                user.status = UserStatus.BLACKLISTED
-                # TODO: Notify security or manager
-            
-            # Check Staff Performance (skip if this is an internal event to prevent recursion)
-            if not skip_performance_check and user.user_type in [UserType.CHEF, UserType.DELIVERY]:
-                # Update staff specific counters
-                staff = user.chef if user.user_type == UserType.CHEF else user.delivery_person
-                if staff:
-                    if event_enum == ReputationEventType.COMPLAINT:
-                        staff.complaints_count += 1
-                    elif event_enum == ReputationEventType.COMPLIMENT:
-                        staff.compliments_count += 1
-                
-                self.check_staff_performance(user_id)
+            self._apply_score_thresholds(user, event_enum, new_score, skip_performance_check)
         
-        self.db.commit()
         return True
     
     def file_complaint(
@@ -223,11 +329,7 @@ class ReputationService:
             Tuple of (success: bool, message: str, complaint_id: Optional[int])
         """
         # Check if complainant is VIP (complaints count double)
-        complainant = self.db.query(Customer).filter(
-            Customer.user_id == complainant_id
-        ).first()
-        
-        weight = 2 if (complainant and complainant.is_vip) else 1
+        weight = 2 if self._is_vip(self._load_user(complainant_id)) else 1
         
         # Create complaint
         complaint = Complaint(
@@ -246,7 +348,7 @@ class ReputationService:
         self.record_event(
             user_id=subject_id,
             event_type="COMPLAINT",
-            details=f"Complaint: {title}",
+            details={"complaint_title": title},
             created_by=complainant_id
         )
         
@@ -276,11 +378,7 @@ class ReputationService:
             Tuple of (success: bool, message: str, compliment_id: Optional[int])
         """
         # Check if giver is VIP (compliments count double)
-        giver = self.db.query(Customer).filter(
-            Customer.user_id == giver_id
-        ).first()
-        
-        weight = 2 if (giver and giver.is_vip) else 1
+        weight = 2 if self._is_vip(self._load_user(giver_id)) else 1
         
         # Create compliment
         compliment = Compliment(
@@ -298,7 +396,7 @@ class ReputationService:
         self.record_event(
             user_id=receiver_id,
             event_type="COMPLIMENT",
-            details=f"Compliment: {title}",
+            details={"compliment_title": title},
             created_by=giver_id
         )
         
@@ -314,9 +412,7 @@ class ReputationService:
     
     def check_warnings(self, user_id: int) -> int:
         """Get warning count for a user."""
-        reputation = self.db.query(Reputation).filter(
-            Reputation.user_id == user_id
-        ).first()
+        reputation = self._get_reputation(user_id)
         
         return reputation.total_warnings if reputation else 0
     
@@ -326,49 +422,89 @@ class ReputationService:
         self.record_event(
             user_id=user_id,
             event_type="WARNING",
-            details=reason
+            details={"reason": reason}
         )
         
-        # Check if user should be deregistered
-        warning_count = self.check_warnings(user_id)
+        # Check if user should be deregistered; the reputation is normally
+        # already in the session from record_event
+        user = self._load_user(user_id)
+        if user and user.reputation:
+            warning_count = user.reputation.total_warnings
+        else:
+            warning_count = self.check_warnings(user_id)
         
-        if warning_count >= settings.WARNING_THRESHOLD_DEREGISTER:
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if user:
-                user.status = UserStatus.DEACTIVATED
+        if user:
+            self._apply_warning_thresholds(user, warning_count)
+        
+        self.db.commit()
+        return True
+    
+    def apply_warnings(self, user_ids: List[int], reason: str) -> int:
+        """
+        Apply the same warning to many users at once.
+        
+        The reputation updates and event rows are written with one statement
+        each; the per-user rules (blacklist, deregistration, VIP demotion,
+        staff performance) then run on users loaded in a single query.
+        
+        Returns:
+            Number of users warned
+        """
+        users = {
+            user.id: user
+            for user in self.db.query(User).options(*_USER_RECORDS).filter(User.id.in_(set(user_ids)))
+        }
+        if not users:
+            return 0
+        
+        for user in users.values():
+            if not user.reputation:
+                self.db.execute(insert_or_ignore(self.db.get_bind(), Reputation, ["user_id"], user_id=user.id, score=0))
+        
+        event_enum = ReputationEventType.WARNING
+        score_change = self._calculate_score_change(event_enum)
+        reputations = self.db.execute(
+            update(Reputation)
+            .where(Reputation.user_id.in_(users))
+            .values(
+                score=Reputation.score + score_change,
+                total_warnings=Reputation.total_warnings + 1
+            )
+            .returning(Reputation.user_id, Reputation.id, Reputation.score, Reputation.total_warnings)
+        ).all()
+        
+        for reputation in reputations:
+            self._log_event(reputation.id, event_enum, "WARNING", score_change, {"reason": reason}, None)
+        
+        for reputation in reputations:
+            user = users[reputation.user_id]
+            self._apply_score_thresholds(user, event_enum, reputation.score)
+            self._apply_warning_thresholds(user, reputation.total_warnings)
+        
+        self.db.commit()
+        return len(reputations)
+    
+    def _apply_warning_thresholds(self, user: User, warning_count: int) -> None:
+        """Deregister or demote a user whose warnings reached the thresholds."""
+        if warning_count >= WARNING_THRESHOLD_DEREGISTER:
+            user.status = UserStatus.DEACTIVATED
         
         # Check if VIP should be demoted
-        customer = self.db.query(Customer).filter(Customer.user_id == user_id).first()
+        customer = user.customer
         if customer and customer.is_vip:
-            if warning_count >= settings.WARNING_THRESHOLD_VIP_DEMOTION:
+            if warning_count >= WARNING_THRESHOLD_VIP_DEMOTION:
                 self._demote_from_vip(customer)
-        
-        self.db.commit()
-        return True
     
     def _calculate_score_change(self, event_type: ReputationEventType) -> int:
         """Calculate score change based on event type."""
-        score_map = {
-            ReputationEventType.COMPLAINT: -10,
-            ReputationEventType.COMPLIMENT: +10,
-            ReputationEventType.WARNING: -20,
-            ReputationEventType.BONUS: +15,
-            ReputationEventType.DEMOTION: -25,
-            ReputationEventType.PROMOTION: +30,
-            ReputationEventType.ORDER_COMPLETED: +2,
-            ReputationEventType.ORDER_REJECTED: -5,
-            ReputationEventType.INSUFFICIENT_FUNDS: -3,
-            ReputationEventType.RATING_RECEIVED: 0,  # Calculated separately
-        }
-        
-        return score_map.get(event_type, 0)
+        return _SCORE_CHANGE.get(event_type, 0)
     
     def _promote_to_vip(self, customer: Customer) -> None:
         """Promote a customer to VIP status."""
         customer.is_vip = True
         customer.vip_since = datetime.utcnow()
         
-        user = self.db.query(User).filter(User.id == customer.user_id).first()
+        user = self._load_user(customer.user_id)
         if user:
             user.user_type = UserType.VIP
     
@@ -378,33 +514,42 @@ class ReputationService:
         customer.vip_since = None
         customer.vip_orders_count = 0
         
+        user = self._load_user(customer.user_id)
+        
         # Clear warnings (per requirements)
-        reputation = self.db.query(Reputation).filter(
-            Reputation.user_id == customer.user_id
-        ).first()
+        reputation = user.reputation if user else None
         if reputation:
             reputation.total_warnings = 0
         
-        user = self.db.query(User).filter(User.id == customer.user_id).first()
         if user:
-            from ..models.user import UserType
             user.user_type = UserType.CUSTOMER
     
     def _cancel_complaint_with_compliment(self, user_id: int) -> None:
         """Cancel one complaint with one compliment."""
-        # Find an unresolved complaint
-        complaint = self.db.query(Complaint).filter(
-            Complaint.subject_id == user_id,
-            Complaint.status == ComplaintStatus.PENDING
+        # Resolve the oldest pending complaint in one statement; SKIP LOCKED
+        # lets concurrent compliments each cancel a different complaint
+        oldest_pending = (
+            select(Complaint.id)
+            .where(Complaint.subject_id == user_id, Complaint.status == ComplaintStatus.PENDING)
+            .order_by(Complaint.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        cancelled = self.db.execute(
+            update(Complaint)
+            .where(Complaint.id == oldest_pending)
+            .values(
+                status=ComplaintStatus.RESOLVED,
+                resolved_at=func.now(),
+                manager_decision="Cancelled by compliment"
+            )
+            .returning(Complaint.id)
         ).first()
         
-        if complaint:
-            complaint.status = ComplaintStatus.RESOLVED
-            complaint.resolved_at = datetime.utcnow()
-            complaint.manager_decision = "Cancelled by compliment"
-            
+        if cancelled:
             # Decrease complaints count for staff
-            user = self.db.query(User).filter(User.id == user_id).first()
+            user = self._load_user(user_id)
             if user:
                 if user.user_type == UserType.CHEF and user.chef:
                     user.chef.complaints_count = max(0, user.chef.complaints_count - 1)
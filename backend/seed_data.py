@@ -3,16 +3,22 @@ Seed data script for AI-Slice database.
 Covers all user flows for demo.
 
 Usage:
-    python seed_data.py
+    python seed_data.py [--reset-schema]
+
+Existing tables are emptied and reused; --reset-schema drops and recreates
+them instead.
 """
 import sys
+from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from sqlalchemy import event, func, insert, select, text, update
+
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.core.database import SessionLocal, engine
-from app.core.security import get_password_hash
+from app.core.database import SessionLocal, engine, init_db
+from app.core.passwords import get_password_hash
 from app.models.user import (
     User, UserType, UserStatus,
     Manager, Chef, DeliveryPerson, Customer
@@ -25,269 +31,238 @@ from app.models.delivery import Delivery, DeliveryStatus, DeliveryBid
 from app.core.database import Base
 
 
-def clear_database():
-    """Clear all tables"""
+def clear_database(reset_schema=False):
+    """
+    Clear all tables.
+    
+    By default existing tables are emptied in one transaction (TRUNCATE on
+    PostgreSQL, DELETE elsewhere) and missing ones created. Pass
+    reset_schema=True to drop and recreate every table instead, e.g. after
+    model changes.
+    """
     print("🗑️  Clearing existing data...")
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database cleared and tables recreated")
+    # Dependency order, computed once for every step below
+    tables = Base.metadata.sorted_tables
+    if reset_schema:
+        Base.metadata.drop_all(bind=engine, tables=tables)
+        # Everything was just dropped, so skip the per-table existence checks
+        Base.metadata.create_all(bind=engine, tables=tables, checkfirst=False)
+        print("✅ Database cleared and tables recreated")
+        return
+    
+    init_db()
+    tables.reverse()
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            names = ", ".join(conn.dialect.identifier_preparer.format_table(t) for t in tables)
+            conn.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+        else:
+            for table in tables:
+                conn.execute(table.delete())
+    print("✅ Database cleared")
 
 
 def create_users(db):
     """Create all users for demo"""
-    print("\n👥 Creating users...")
-    
-    users_created = []
-    
-    # ==================== MANAGER ====================
-    manager_user = User(
-        username="manager",
-        email="manager@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Sarah Manager",
-        phone="555-0001",
-        user_type=UserType.MANAGER,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(manager_user)
-    db.flush()
-    
-    manager = Manager(user_id=manager_user.id, department="Operations", access_level=1)
-    db.add(manager)
-    print(f"  ✓ Manager: manager@test.com")
-    users_created.append(manager_user)
-    
-    # ==================== CHEF (1) ====================
-    chef_user = User(
-        username="chef",
-        email="chef@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Mario Chef",
-        phone="555-0101",
-        user_type=UserType.CHEF,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(chef_user)
-    db.flush()
-    
-    chef = Chef(
-        user_id=chef_user.id,
-        specialization="Italian & International",
-        salary=3500.0,
-        average_rating=4.5,
-        total_orders_completed=50
-    )
-    db.add(chef)
-    db.add(Reputation(user_id=chef_user.id, score=100))
-    print(f"  ✓ Chef: chef@test.com (Mario Chef)")
-    users_created.append(chef_user)
-    
-    # ==================== DELIVERY DRIVERS (2) ====================
-    delivery1_user = User(
-        username="delivery",
-        email="delivery@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Dan Driver",
-        phone="555-0201",
-        user_type=UserType.DELIVERY,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(delivery1_user)
-    db.flush()
-    
-    delivery1 = DeliveryPerson(
-        user_id=delivery1_user.id,
-        vehicle_type="Motorcycle",
-        salary=2000.0,
-        average_rating=4.3,
-        total_deliveries=30
-    )
-    db.add(delivery1)
-    db.add(Reputation(user_id=delivery1_user.id, score=100))
-    print(f"  ✓ Delivery #1: delivery@test.com (Dan Driver - Motorcycle)")
-    users_created.append(delivery1_user)
-    
-    delivery2_user = User(
-        username="delivery2",
-        email="delivery2@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Lisa Swift",
-        phone="555-0202",
-        user_type=UserType.DELIVERY,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(delivery2_user)
-    db.flush()
-    
-    delivery2 = DeliveryPerson(
-        user_id=delivery2_user.id,
-        vehicle_type="Bicycle",
-        salary=1800.0,
-        average_rating=4.7,
-        total_deliveries=45
-    )
-    db.add(delivery2)
-    db.add(Reputation(user_id=delivery2_user.id, score=100))
-    print(f"  ✓ Delivery #2: delivery2@test.com (Lisa Swift - Bicycle)")
-    users_created.append(delivery2_user)
-    
-    # ==================== CUSTOMERS (2 regular) ====================
-    customer1_user = User(
-        username="customer",
-        email="customer@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Alice Customer",
-        phone="555-0301",
-        user_type=UserType.CUSTOMER,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(customer1_user)
-    db.flush()
-    
-    customer1 = Customer(
-        user_id=customer1_user.id,
-        address="123 Main St, Apt 4B",
-        is_vip=False,
-        total_orders=2,
-        total_spent=45.0
-    )
-    db.add(customer1)
-    db.add(Wallet(user_id=customer1_user.id, balance=150.0))
-    db.add(Reputation(user_id=customer1_user.id, score=100))
-    print(f"  ✓ Customer #1: customer@test.com (Alice - $150)")
-    users_created.append(customer1_user)
-    
-    customer2_user = User(
-        username="customer2",
-        email="customer2@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Bob Smith",
-        phone="555-0302",
-        user_type=UserType.CUSTOMER,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(customer2_user)
-    db.flush()
-    
-    customer2 = Customer(
-        user_id=customer2_user.id,
-        address="456 Oak Ave",
-        is_vip=False,
-        total_orders=0,
-        total_spent=0.0
-    )
-    db.add(customer2)
-    db.add(Wallet(user_id=customer2_user.id, balance=75.0))
-    db.add(Reputation(user_id=customer2_user.id, score=100))
-    print(f"  ✓ Customer #2: customer2@test.com (Bob - $75)")
-    users_created.append(customer2_user)
-    
-    # ==================== VIP CUSTOMER ====================
-    vip_user = User(
-        username="vip",
-        email="vip@test.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Victoria VIP",
-        phone="555-0303",
-        user_type=UserType.VIP,
-        status=UserStatus.ACTIVE,
-        created_at=datetime.utcnow()
-    )
-    db.add(vip_user)
-    db.flush()
-    
-    vip_customer = Customer(
-        user_id=vip_user.id,
-        address="500 Luxury Lane, Penthouse",
-        is_vip=True,
-        vip_since=datetime.utcnow() - timedelta(days=30),
-        total_orders=15,
-        total_spent=500.0
-    )
-    db.add(vip_customer)
-    db.add(Wallet(user_id=vip_user.id, balance=500.0))
-    db.add(Reputation(user_id=vip_user.id, score=100))
-    print(f"  ⭐ VIP: vip@test.com (Victoria VIP - $500)")
-    users_created.append(vip_user)
-    
-    # ==================== PENDING USERS (for approval demo) ====================
-    # Pending Customer
-    pending_cust = User(
-        username="john_new",
-        email="john@email.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="John Newuser",
-        phone="555-9901",
-        user_type=UserType.CUSTOMER,
-        status=UserStatus.PENDING,
-        created_at=datetime.utcnow() - timedelta(hours=2)
-    )
-    db.add(pending_cust)
-    db.flush()
-    db.add(Customer(user_id=pending_cust.id, address="789 New St"))
-    print(f"  ⏳ Pending Customer: john@email.com (John Newuser)")
-    users_created.append(pending_cust)
-    
-    # Pending Delivery Driver
-    pending_del = User(
-        username="mike_driver",
-        email="mike.driver@email.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Mike Driver",
-        phone="555-9902",
-        user_type=UserType.DELIVERY,
-        status=UserStatus.PENDING,
-        created_at=datetime.utcnow() - timedelta(hours=5)
-    )
-    db.add(pending_del)
-    db.flush()
-    db.add(DeliveryPerson(user_id=pending_del.id, vehicle_type="Car", salary=0))
-    print(f"  ⏳ Pending Delivery: mike.driver@email.com (Mike Driver)")
-    users_created.append(pending_del)
-    
-    # Pending Chef
-    pending_chef = User(
-        username="anna_chef",
-        email="anna.chef@email.com",
-        hashed_password=get_password_hash("password123"),
-        full_name="Anna Baker",
-        phone="555-9903",
-        user_type=UserType.CHEF,
-        status=UserStatus.PENDING,
-        created_at=datetime.utcnow() - timedelta(days=1)
-    )
-    db.add(pending_chef)
-    db.flush()
-    db.add(Chef(user_id=pending_chef.id, specialization="French Pastry", salary=0))
-    print(f"  ⏳ Pending Chef: anna.chef@email.com (Anna Baker)")
-    users_created.append(pending_chef)
-    
-    db.commit()
-    print(f"✅ Created {len(users_created)} users (3 pending for approval)")
+    # Progress lines are collected and printed once at the end of the phase
+    log = []
+    log.append("\n👥 Creating users...")
+    
+    # One timestamp for the whole phase; relative times are offsets from it
+    now = datetime.utcnow()
+    
+    # Each seed user: the User row, its role row, and optional wallet balance
+    # and reputation score. User rows default to active and created now
+    seed_users = [
+        # ==================== MANAGER ====================
+        {
+            "user": dict(
+                username="manager", email="manager@test.com",
+                full_name="Sarah Manager", phone="555-0001",
+                user_type=UserType.MANAGER
+            ),
+            "role": Manager, "role_row": dict(department="Operations", access_level=1),
+            "label": "  ✓ Manager: manager@test.com",
+        },
+        # ==================== CHEF (1) ====================
+        {
+            "user": dict(
+                username="chef", email="chef@test.com",
+                full_name="Mario Chef", phone="555-0101",
+                user_type=UserType.CHEF
+            ),
+            "role": Chef, "role_row": dict(
+                specialization="Italian & International",
+                salary=3500.0,
+                average_rating=4.5,
+                total_orders_completed=50
+            ),
+            "reputation": 100,
+            "label": "  ✓ Chef: chef@test.com (Mario Chef)",
+        },
+        # ==================== DELIVERY DRIVERS (2) ====================
+        {
+            "user": dict(
+                username="delivery", email="delivery@test.com",
+                full_name="Dan Driver", phone="555-0201",
+                user_type=UserType.DELIVERY
+            ),
+            "role": DeliveryPerson, "role_row": dict(
+                vehicle_type="Motorcycle",
+                salary=2000.0,
+                average_rating=4.3,
+                total_deliveries=30
+            ),
+            "reputation": 100,
+            "label": "  ✓ Delivery #1: delivery@test.com (Dan Driver - Motorcycle)",
+        },
+        {
+            "user": dict(
+                username="delivery2", email="delivery2@test.com",
+                full_name="Lisa Swift", phone="555-0202",
+                user_type=UserType.DELIVERY
+            ),
+            "role": DeliveryPerson, "role_row": dict(
+                vehicle_type="Bicycle",
+                salary=1800.0,
+                average_rating=4.7,
+                total_deliveries=45
+            ),
+            "reputation": 100,
+            "label": "  ✓ Delivery #2: delivery2@test.com (Lisa Swift - Bicycle)",
+        },
+        # ==================== CUSTOMERS (2 regular) ====================
+        {
+            "user": dict(
+                username="customer", email="customer@test.com",
+                full_name="Alice Customer", phone="555-0301",
+                user_type=UserType.CUSTOMER
+            ),
+            "role": Customer, "role_row": dict(
+                address="123 Main St, Apt 4B",
+                is_vip=False
+            ),
+            "wallet": 150.0, "reputation": 100,
+            "label": "  ✓ Customer #1: customer@test.com (Alice - $150)",
+        },
+        {
+            "user": dict(
+                username="customer2", email="customer2@test.com",
+                full_name="Bob Smith", phone="555-0302",
+                user_type=UserType.CUSTOMER
+            ),
+            "role": Customer, "role_row": dict(
+                address="456 Oak Ave",
+                is_vip=False
+            ),
+            "wallet": 75.0, "reputation": 100,
+            "label": "  ✓ Customer #2: customer2@test.com (Bob - $75)",
+        },
+        # ==================== VIP CUSTOMER ====================
+        {
+            "user": dict(
+                username="vip", email="vip@test.com",
+                full_name="Victoria VIP", phone="555-0303",
+                user_type=UserType.VIP
+            ),
+            "role": Customer, "role_row": dict(
+                address="500 Luxury Lane, Penthouse",
+                is_vip=True,
+                vip_since=now - timedelta(days=30),
+                # History before the sample orders; refresh_stats adds those on top
+                total_orders=14,
+                total_spent=462.01
+            ),
+            "wallet": 500.0, "reputation": 100,
+            "label": "  ⭐ VIP: vip@test.com (Victoria VIP - $500)",
+        },
+        # ==================== PENDING USERS (for approval demo) ====================
+        # Pending Customer
+        {
+            "user": dict(
+                username="john_new", email="john@email.com",
+                full_name="John Newuser", phone="555-9901",
+                user_type=UserType.CUSTOMER, status=UserStatus.PENDING,
+                created_at=now - timedelta(hours=2)
+            ),
+            "role": Customer, "role_row": dict(address="789 New St"),
+            "label": "  ⏳ Pending Customer: john@email.com (John Newuser)",
+        },
+        # Pending Delivery Driver
+        {
+            "user": dict(
+                username="mike_driver", email="mike.driver@email.com",
+                full_name="Mike Driver", phone="555-9902",
+                user_type=UserType.DELIVERY, status=UserStatus.PENDING,
+                created_at=now - timedelta(hours=5)
+            ),
+            "role": DeliveryPerson, "role_row": dict(vehicle_type="Car", salary=0),
+            "label": "  ⏳ Pending Delivery: mike.driver@email.com (Mike Driver)",
+        },
+        # Pending Chef
+        {
+            "user": dict(
+                username="anna_chef", email="anna.chef@email.com",
+                full_name="Anna Baker", phone="555-9903",
+                user_type=UserType.CHEF, status=UserStatus.PENDING,
+                created_at=now - timedelta(days=1)
+            ),
+            "role": Chef, "role_row": dict(specialization="French Pastry", salary=0),
+            "label": "  ⏳ Pending Chef: anna.chef@email.com (Anna Baker)",
+        },
+    ]
     
-    return users_created
+    # All demo accounts share one password, so hash it once
+    hashed_password = get_password_hash("password123")
+    
+    # Insert all users in one batch; RETURNING gives their IDs in input order
+    user_ids = db.scalars(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [
+            {"status": UserStatus.ACTIVE, "created_at": now, "hashed_password": hashed_password, **seed["user"]}
+            for seed in seed_users
+        ]
+    ).all()
+    
+    # Then one batch per child table
+    role_rows = defaultdict(list)
+    wallet_rows = []
+    reputation_rows = []
+    for user_id, seed in zip(user_ids, seed_users):
+        role_rows[seed["role"]].append(dict(seed["role_row"], user_id=user_id))
+        if "wallet" in seed:
+            wallet_rows.append(dict(user_id=user_id, balance=seed["wallet"]))
+        if "reputation" in seed:
+            reputation_rows.append(dict(user_id=user_id, score=seed["reputation"]))
+        log.append(seed["label"])
+    
+    for role, rows in role_rows.items():
+        db.execute(insert(role), rows)
+    db.execute(insert(Wallet), wallet_rows)
+    db.execute(insert(Reputation), reputation_rows)
+    
+    log.append(f"✅ Created {len(user_ids)} users (3 pending for approval)")
+    print("\n".join(log))
+    
+    return user_ids
 
 
 def create_menu(db):
     """Create menu with VIP items clearly marked"""
-    print("\n🍕 Creating menu items...")
+    # Progress lines are collected and printed once at the end of the phase
+    log = []
+    log.append("\n🍕 Creating menu items...")
     
     chef = db.query(Chef).first()
     
-    # Categories
-    categories = {}
-    for name in ["Pizza", "Pasta", "Salads", "Desserts", "Drinks", "VIP Specials"]:
-        cat = DishCategory(name=name, description=f"Our {name}")
-        db.add(cat)
-        db.flush()
-        categories[name] = cat
-        print(f"  ✓ Category: {name}")
+    # Categories, inserted in one statement; name -> ID
+    category_names = ["Pizza", "Pasta", "Salads", "Desserts", "Drinks", "VIP Specials"]
+    categories = dict(db.execute(
+        insert(DishCategory).returning(DishCategory.name, DishCategory.id),
+        [{"name": name, "description": f"Our {name}"} for name in category_names]
+    ).all())
+    for name in category_names:
+        log.append(f"  ✓ Category: {name}")
     
     # Regular dishes
     dishes_data = [
@@ -351,46 +326,74 @@ def create_menu(db):
          "is_special": True},
     ]
     
-    regular_count = 0
+    dish_rows = []
     for d in dishes_data:
-        dish = Dish(
+        dish_rows.append(dict(
             name=d["name"], description=d["description"], price=d["price"],
-            category_id=categories[d["category"]].id, chef_id=chef.id,
+            category_id=categories[d["category"]], chef_id=chef.id,
             is_available=True, is_special=False, average_rating=4.5,
             image_url=d.get("image_url", "")
-        )
-        db.add(dish)
-        regular_count += 1
-        print(f"  ✓ {d['name']} (${d['price']})")
+        ))
+        log.append(f"  ✓ {d['name']} (${d['price']})")
+    regular_count = len(dish_rows)
     
-    vip_count = 0
     for d in vip_dishes:
-        dish = Dish(
+        dish_rows.append(dict(
             name=d["name"], description=d["description"], price=d["price"],
-            category_id=categories[d["category"]].id, chef_id=chef.id,
+            category_id=categories[d["category"]], chef_id=chef.id,
             is_available=True, is_special=True, average_rating=4.9,
             image_url=d.get("image_url", "")
-        )
-        db.add(dish)
-        vip_count += 1
-        print(f"  ⭐ {d['name']} (${d['price']}) - VIP ONLY")
-    
-    db.commit()
-    print(f"✅ Created {regular_count} regular dishes + {vip_count} VIP specials")
-    return categories
+        ))
+        log.append(f"  ⭐ {d['name']} (${d['price']}) - VIP ONLY")
+    vip_count = len(dish_rows) - regular_count
+    
+    # All dishes in one batched INSERT; name -> (name, id, price) for the order phase
+    dishes = {
+        row.name: row
+        for row in db.execute(insert(Dish).returning(Dish.name, Dish.id, Dish.price), dish_rows)
+    }
+    
+    log.append(f"✅ Created {regular_count} regular dishes + {vip_count} VIP specials")
+    print("\n".join(log))
+    return dishes
 
 
-def create_sample_orders(db):
-    """Create orders covering different statuses"""
-    print("\n📦 Creating sample orders...")
-    
-    customer1 = db.query(Customer).join(User).filter(User.username == "customer").first()
-    customer2 = db.query(Customer).join(User).filter(User.username == "customer2").first()
-    vip_customer = db.query(Customer).join(User).filter(User.username == "vip").first()
-    delivery1 = db.query(DeliveryPerson).join(User).filter(User.username == "delivery").first()
-    delivery2 = db.query(DeliveryPerson).join(User).filter(User.username == "delivery2").first()
-    dishes = db.query(Dish).filter(Dish.is_special == False).all()
-    vip_dishes = db.query(Dish).filter(Dish.is_special == True).all()
+def load_seed_users(db, usernames):
+    """Load users with their customer and delivery records in one query, keyed by username"""
+    rows = db.execute(
+        select(User, Customer, DeliveryPerson)
+        .outerjoin(Customer, Customer.user_id == User.id)
+        .outerjoin(DeliveryPerson, DeliveryPerson.user_id == User.id)
+        .where(User.username.in_(usernames))
+    ).all()
+    return {row.User.username: row for row in rows}
+
+
+def create_sample_orders(db, dishes):
+    """Create orders covering different statuses, from the dishes returned by create_menu"""
+    # Progress lines are collected and printed once at the end of the phase
+    log = []
+    log.append("\n📦 Creating sample orders...")
+    
+    # One timestamp for the whole phase; relative times are offsets from it
+    now = datetime.utcnow()
+    
+    users = load_seed_users(db, ["customer", "customer2", "vip", "delivery", "delivery2"])
+    customer1 = users["customer"].Customer
+    customer2 = users["customer2"].Customer
+    vip_customer = users["vip"].Customer
+    delivery1 = users["delivery"].DeliveryPerson
+    delivery2 = users["delivery2"].DeliveryPerson
+    # Orders and deliveries copy the customer's address
+    address1 = customer1.address
+    address2 = customer2.address
+    vip_address = vip_customer.address
+    # Only the ID and price of the dishes the sample orders use
+    dish_names = [
+        "Margherita Pizza", "Pepperoni Pizza", "Spaghetti Carbonara",
+        "Penne Arrabbiata", "Caesar Salad", "🌟 Lobster Linguine"
+    ]
+    margherita, pepperoni, carbonara, arrabbiata, caesar, lobster = (dishes[name] for name in dish_names)
     
     orders = []
     
@@ -399,103 +402,97 @@ def create_sample_orders(db):
         customer_id=customer1.id, order_number="ORD-001",
         status=OrderStatus.DELIVERED, payment_status=PaymentStatus.PAID,
         subtotal=27.98, discount_amount=0, delivery_fee=3.99, total_amount=31.97,
-        delivery_address=customer1.address,
-        created_at=datetime.utcnow() - timedelta(days=2)
+        delivery_address=address1,
+        created_at=now - timedelta(days=2)
     )
     db.add(order1)
-    db.flush()
     
-    db.add(OrderItem(order_id=order1.id, dish_id=dishes[0].id, quantity=1, 
-                     unit_price=dishes[0].price, total_price=dishes[0].price))
-    db.add(OrderItem(order_id=order1.id, dish_id=dishes[3].id, quantity=1,
-                     unit_price=dishes[3].price, total_price=dishes[3].price))
+    order1.items.append(OrderItem(dish_id=margherita.id, quantity=1,
+                                  unit_price=margherita.price, total_price=margherita.price))
+    order1.items.append(OrderItem(dish_id=carbonara.id, quantity=1,
+                                  unit_price=carbonara.price, total_price=carbonara.price))
     
-    db.add(Delivery(
-        order_id=order1.id, delivery_person_id=delivery1.id,
-        pickup_address="AI-Slice Kitchen", delivery_address=customer1.address,
+    order1.delivery = Delivery(
+        delivery_person_id=delivery1.id,
+        pickup_address="AI-Slice Kitchen", delivery_address=address1,
         status=DeliveryStatus.DELIVERED, delivery_fee=3.99,
-        actual_delivery_time=datetime.utcnow() - timedelta(days=2, hours=-1)
-    ))
+        actual_delivery_time=now - timedelta(days=2, hours=-1)
+    )
     orders.append(order1)
-    print(f"  ✓ Order #1: DELIVERED (customer - can give feedback)")
+    log.append(f"  ✓ Order #1: DELIVERED (customer - can give feedback)")
     
     # ==================== ORDER 2: DELIVERED (for customer - rated) ====================
     order2 = Order(
         customer_id=customer1.id, order_number="ORD-002",
         status=OrderStatus.DELIVERED, payment_status=PaymentStatus.PAID,
         subtotal=14.99, discount_amount=0, delivery_fee=3.99, total_amount=18.98,
-        delivery_address=customer1.address, food_rating=5.0, delivery_rating=4.5,
-        created_at=datetime.utcnow() - timedelta(days=1)
+        delivery_address=address1, food_rating=5.0, delivery_rating=4.5,
+        created_at=now - timedelta(days=1)
     )
     db.add(order2)
-    db.flush()
     
-    db.add(OrderItem(order_id=order2.id, dish_id=dishes[1].id, quantity=1,
-                     unit_price=dishes[1].price, total_price=dishes[1].price))
+    order2.items.append(OrderItem(dish_id=pepperoni.id, quantity=1,
+                                  unit_price=pepperoni.price, total_price=pepperoni.price))
     
-    db.add(Delivery(
-        order_id=order2.id, delivery_person_id=delivery2.id,
-        pickup_address="AI-Slice Kitchen", delivery_address=customer1.address,
+    order2.delivery = Delivery(
+        delivery_person_id=delivery2.id,
+        pickup_address="AI-Slice Kitchen", delivery_address=address1,
         status=DeliveryStatus.DELIVERED, delivery_fee=3.99
-    ))
+    )
     orders.append(order2)
-    print(f"  ✓ Order #2: DELIVERED + RATED (customer)")
+    log.append(f"  ✓ Order #2: DELIVERED + RATED (customer)")
     
     # ==================== ORDER 3: PREPARING (chef working on it) ====================
     order3 = Order(
         customer_id=customer2.id, order_number="ORD-003",
         status=OrderStatus.PREPARING, payment_status=PaymentStatus.PAID,
         subtotal=24.98, discount_amount=0, delivery_fee=3.99, total_amount=28.97,
-        delivery_address=customer2.address,
-        created_at=datetime.utcnow() - timedelta(minutes=15)
+        delivery_address=address2,
+        created_at=now - timedelta(minutes=15)
     )
     db.add(order3)
-    db.flush()
     
-    db.add(OrderItem(order_id=order3.id, dish_id=dishes[0].id, quantity=1,
-                     unit_price=dishes[0].price, total_price=dishes[0].price))
-    db.add(OrderItem(order_id=order3.id, dish_id=dishes[4].id, quantity=1,
-                     unit_price=dishes[4].price, total_price=dishes[4].price))
+    order3.items.append(OrderItem(dish_id=margherita.id, quantity=1,
+                                  unit_price=margherita.price, total_price=margherita.price))
+    order3.items.append(OrderItem(dish_id=arrabbiata.id, quantity=1,
+                                  unit_price=arrabbiata.price, total_price=arrabbiata.price))
     
     # Delivery awaiting - chef will mark ready
-    db.add(Delivery(
-        order_id=order3.id, pickup_address="AI-Slice Kitchen",
-        delivery_address=customer2.address, status=DeliveryStatus.PENDING_BIDDING,
+    order3.delivery = Delivery(
+        pickup_address="AI-Slice Kitchen",
+        delivery_address=address2, status=DeliveryStatus.PENDING_BIDDING,
         delivery_fee=3.99
-    ))
+    )
     orders.append(order3)
-    print(f"  ✓ Order #3: PREPARING (chef can mark ready)")
+    log.append(f"  ✓ Order #3: PREPARING (chef can mark ready)")
     
     # ==================== ORDER 4: READY - PENDING BIDDING (delivery can bid) ====================
     order4 = Order(
         customer_id=customer1.id, order_number="ORD-004",
         status=OrderStatus.READY_FOR_DELIVERY, payment_status=PaymentStatus.PAID,
         subtotal=8.99, discount_amount=0, delivery_fee=3.99, total_amount=12.98,
-        delivery_address=customer1.address,
-        created_at=datetime.utcnow() - timedelta(minutes=30)
+        delivery_address=address1,
+        created_at=now - timedelta(minutes=30)
     )
     db.add(order4)
-    db.flush()
     
-    db.add(OrderItem(order_id=order4.id, dish_id=dishes[5].id, quantity=1,
-                     unit_price=dishes[5].price, total_price=dishes[5].price))
+    order4.items.append(OrderItem(dish_id=caesar.id, quantity=1,
+                                  unit_price=caesar.price, total_price=caesar.price))
     
-    delivery4 = Delivery(
-        order_id=order4.id, pickup_address="AI-Slice Kitchen",
-        delivery_address=customer1.address, status=DeliveryStatus.PENDING_BIDDING,
+    order4.delivery = Delivery(
+        pickup_address="AI-Slice Kitchen",
+        delivery_address=address1, status=DeliveryStatus.PENDING_BIDDING,
         delivery_fee=3.99
     )
-    db.add(delivery4)
-    db.flush()
     
     # Add a sample bid from delivery2
-    db.add(DeliveryBid(
-        delivery_id=delivery4.id, delivery_person_id=delivery2.id,
+    order4.delivery.bids.append(DeliveryBid(
+        delivery_person_id=delivery2.id,
         bid_amount=4.99, estimated_time=20,
-        created_at=datetime.utcnow() - timedelta(minutes=5)
+        created_at=now - timedelta(minutes=5)
     ))
     orders.append(order4)
-    print(f"  ✓ Order #4: READY - waiting for bids (has 1 bid)")
+    log.append(f"  ✓ Order #4: READY - waiting for bids (has 1 bid)")
     
     # ==================== ORDER 5: VIP ORDER - PLACED (new) ====================
     order5 = Order(
@@ -503,123 +500,163 @@ def create_sample_orders(db):
         status=OrderStatus.PLACED, payment_status=PaymentStatus.PAID,
         subtotal=39.99, discount_amount=2.00, delivery_fee=0, total_amount=37.99,
         is_vip_order=True, is_free_delivery=True,
-        delivery_address=vip_customer.address,
-        created_at=datetime.utcnow() - timedelta(minutes=5)
+        delivery_address=vip_address,
+        created_at=now - timedelta(minutes=5)
     )
     db.add(order5)
-    db.flush()
     
-    db.add(OrderItem(order_id=order5.id, dish_id=vip_dishes[1].id, quantity=1,
-                     unit_price=vip_dishes[1].price, total_price=vip_dishes[1].price))
+    order5.items.append(OrderItem(dish_id=lobster.id, quantity=1,
+                                  unit_price=lobster.price, total_price=lobster.price))
     
-    db.add(Delivery(
-        order_id=order5.id, pickup_address="AI-Slice Kitchen",
-        delivery_address=vip_customer.address, status=DeliveryStatus.PENDING_BIDDING,
+    order5.delivery = Delivery(
+        pickup_address="AI-Slice Kitchen",
+        delivery_address=vip_address, status=DeliveryStatus.PENDING_BIDDING,
         delivery_fee=0
-    ))
+    )
     orders.append(order5)
-    print(f"  ⭐ Order #5: VIP ORDER - PLACED (chef should see)")
+    log.append(f"  ⭐ Order #5: VIP ORDER - PLACED (chef should see)")
     
-    db.commit()
-    print(f"✅ Created {len(orders)} orders covering all statuses")
+    # Orders, items, deliveries and bids are each written as one batch;
+    # flush so later phases can query them
+    db.flush()
+    log.append(f"✅ Created {len(orders)} orders covering all statuses")
+    print("\n".join(log))
     return orders
 
 
 def create_sample_feedback(db):
     """Create complaints and compliments"""
-    print("\n💬 Creating sample feedback...")
-    
-    customer1 = db.query(User).filter(User.username == "customer").first()
-    customer2 = db.query(User).filter(User.username == "customer2").first()
-    vip = db.query(User).filter(User.username == "vip").first()
-    chef = db.query(User).filter(User.username == "chef").first()
-    delivery1 = db.query(User).filter(User.username == "delivery").first()
-    delivery2 = db.query(User).filter(User.username == "delivery2").first()
+    # Progress lines are collected and printed once at the end of the phase
+    log = []
+    log.append("\n💬 Creating sample feedback...")
+    
+    # One timestamp for the whole phase; relative times are offsets from it
+    now = datetime.utcnow()
+    
+    users = load_seed_users(db, ["customer", "customer2", "vip", "chef", "delivery", "delivery2"])
+    customer1 = users["customer"].User
+    customer2 = users["customer2"].User
+    vip = users["vip"].User
+    chef = users["chef"].User
+    delivery1 = users["delivery"].User
+    delivery2 = users["delivery2"].User
     orders = db.query(Order).filter(Order.status == OrderStatus.DELIVERED).all()
     
+    # Rows share the same keys so each table gets a single INSERT
+    compliment_rows = []
+    complaint_rows = []
+    
     # ==================== COMPLIMENTS ====================
     # Customer → Chef
-    db.add(Compliment(
+    compliment_rows.append(dict(
         giver_id=customer1.id, receiver_id=chef.id,
         order_id=orders[0].id if orders else None,
         title="Best Pizza Ever!",
         description="The Margherita was perfectly cooked. Crispy crust, fresh ingredients!",
-        weight=1, created_at=datetime.utcnow() - timedelta(hours=12)
+        weight=1, created_at=now - timedelta(hours=12)
     ))
-    print(f"  ✓ Compliment: customer → chef (Best Pizza!)")
+    log.append(f"  ✓ Compliment: customer → chef (Best Pizza!)")
     
     # Customer → Delivery
-    db.add(Compliment(
+    compliment_rows.append(dict(
         giver_id=customer1.id, receiver_id=delivery1.id,
         order_id=orders[0].id if orders else None,
         title="Lightning Fast Delivery",
         description="Arrived in 15 minutes, food was still hot!",
-        weight=1, created_at=datetime.utcnow() - timedelta(hours=10)
+        weight=1, created_at=now - timedelta(hours=10)
     ))
-    print(f"  ✓ Compliment: customer → delivery (Fast Delivery)")
+    log.append(f"  ✓ Compliment: customer → delivery (Fast Delivery)")
     
     # VIP → Chef (counts double)
-    db.add(Compliment(
-        giver_id=vip.id, receiver_id=chef.id,
+    compliment_rows.append(dict(
+        giver_id=vip.id, receiver_id=chef.id, order_id=None,
         title="Exceptional VIP Experience",
         description="The Lobster Linguine was restaurant quality. Worth every penny!",
-        weight=2, created_at=datetime.utcnow() - timedelta(hours=5)
+        weight=2, created_at=now - timedelta(hours=5)
     ))
-    print(f"  ⭐ Compliment: VIP → chef (Exceptional - 2x weight)")
+    log.append(f"  ⭐ Compliment: VIP → chef (Exceptional - 2x weight)")
     
     # Customer2 → Delivery2
-    db.add(Compliment(
-        giver_id=customer2.id, receiver_id=delivery2.id,
+    compliment_rows.append(dict(
+        giver_id=customer2.id, receiver_id=delivery2.id, order_id=None,
         title="Super Friendly!",
         description="Lisa was so nice and even helped carry groceries.",
-        weight=1, created_at=datetime.utcnow() - timedelta(hours=3)
+        weight=1, created_at=now - timedelta(hours=3)
     ))
-    print(f"  ✓ Compliment: customer2 → delivery2 (Friendly)")
+    log.append(f"  ✓ Compliment: customer2 → delivery2 (Friendly)")
     
     # ==================== COMPLAINTS ====================
     # Resolved complaint
-    db.add(Complaint(
+    complaint_rows.append(dict(
         complainant_id=vip.id, subject_id=delivery1.id,
         order_id=orders[1].id if len(orders) > 1 else None,
         title="Late Delivery",
         description="Order arrived 30 minutes late. The pasta was cold.",
         status=ComplaintStatus.RESOLVED,
         manager_decision="Warning issued to driver. Customer credited $5.",
-        weight=2, created_at=datetime.utcnow() - timedelta(days=3)
+        weight=2, created_at=now - timedelta(days=3)
     ))
-    print(f"  ✓ Complaint: VIP → delivery (Late - RESOLVED)")
+    log.append(f"  ✓ Complaint: VIP → delivery (Late - RESOLVED)")
     
     # Pending complaint (manager needs to review)
-    db.add(Complaint(
-        complainant_id=customer1.id, subject_id=chef.id,
+    complaint_rows.append(dict(
+        complainant_id=customer1.id, subject_id=chef.id, order_id=None,
         title="Missing Item",
         description="Ordered 2 pizzas but only received 1. Please check.",
-        status=ComplaintStatus.PENDING,
-        weight=1, created_at=datetime.utcnow() - timedelta(hours=2)
+        status=ComplaintStatus.PENDING, manager_decision=None,
+        weight=1, created_at=now - timedelta(hours=2)
     ))
-    print(f"  ⚠️ Complaint: customer → chef (Missing Item - PENDING)")
+    log.append(f"  ⚠️ Complaint: customer → chef (Missing Item - PENDING)")
     
     # Another pending complaint
-    db.add(Complaint(
-        complainant_id=customer2.id, subject_id=delivery1.id,
+    complaint_rows.append(dict(
+        complainant_id=customer2.id, subject_id=delivery1.id, order_id=None,
         title="Rude Behavior",
         description="Driver was impatient and threw the bag at my door.",
-        status=ComplaintStatus.PENDING,
-        weight=1, created_at=datetime.utcnow() - timedelta(hours=1)
+        status=ComplaintStatus.PENDING, manager_decision=None,
+        weight=1, created_at=now - timedelta(hours=1)
     ))
-    print(f"  ⚠️ Complaint: customer2 → delivery (Rude - PENDING)")
+    log.append(f"  ⚠️ Complaint: customer2 → delivery (Rude - PENDING)")
+    
+    db.execute(insert(Compliment), compliment_rows)
+    db.execute(insert(Complaint), complaint_rows)
     
-    db.commit()
-    print(f"✅ Created 4 compliments + 3 complaints (2 pending for manager)")
+    log.append(f"✅ Created 4 compliments + 3 complaints (2 pending for manager)")
+    print("\n".join(log))
+
+
+def refresh_stats(db):
+    """
+    Add the seeded paid orders to each customer's order totals in one statement.
+    
+    Totals seeded on the customer row stand for earlier history (the VIP's
+    past orders); everyone else starts from zero.
+    """
+    paid_orders = (Order.customer_id == Customer.id, Order.payment_status == PaymentStatus.PAID)
+    db.execute(
+        update(Customer)
+        .values(
+            total_orders=Customer.total_orders
+            + select(func.count(Order.id)).where(*paid_orders).scalar_subquery(),
+            total_spent=func.round(
+                Customer.total_spent
+                + select(func.coalesce(func.sum(Order.total_amount), 0.0)).where(*paid_orders).scalar_subquery(),
+                2
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    print("✅ Customer order totals derived from seeded orders")
 
 
 def print_summary():
     """Print summary"""
-    print("\n" + "=" * 70)
-    print("🎉 DATABASE SEEDED SUCCESSFULLY!")
-    print("=" * 70)
-    
-    print("""
+    # One write for the whole banner
+    print("\n".join([
+        "\n" + "=" * 70,
+        "🎉 DATABASE SEEDED SUCCESSFULLY!",
+        "=" * 70,
+        """
 📊 DATA SUMMARY:
   • Users: 10 total
     - 1 Manager
@@ -630,13 +667,11 @@ def print_summary():
   • Menu: 11 regular + 4 VIP specials = 15 dishes
   • Orders: 5 (various statuses)
   • Feedback: 4 compliments + 3 complaints
-""")
-    
-    print("=" * 70)
-    print("🔑 LOGIN ACCOUNTS (password: password123)")
-    print("=" * 70)
-    
-    print("""
+""",
+        "=" * 70,
+        "🔑 LOGIN ACCOUNTS (password: password123)",
+        "=" * 70,
+        """
 ┌────────────────────────────────────────────────────────────────────┐
 │  ROLE           │  EMAIL                │  NAME          │ NOTES  │
 ├────────────────────────────────────────────────────────────────────┤
@@ -652,9 +687,8 @@ def print_summary():
 │  ⏳ PENDING     │  mike.driver@email.com│  Mike Driver   │ Deliv  │
 │  ⏳ PENDING     │  anna.chef@email.com  │  Anna Baker    │ Chef   │
 └────────────────────────────────────────────────────────────────────┘
-""")
-    
-    print("""
+""",
+        """
 🎬 DEMO FLOWS:
 ═══════════════════════════════════════════════════════════════════
 
@@ -687,7 +721,29 @@ def print_summary():
     • Review and resolve with decision
 
 ═══════════════════════════════════════════════════════════════════
-""")
+"""
+    ]))
+
+
+def relax_sqlite_durability():
+    """
+    Skip fsyncs, keep the rollback journal in memory and give SQLite a
+    64 MiB page cache with in-memory temp storage.
+    
+    A crash mid-seed can corrupt the file, which is acceptable for a
+    throwaway demo database but never for the app's own engine.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(engine, "connect")
+    def _seed_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
 
 
 def main():
@@ -699,14 +755,19 @@ def main():
         print("Cancelled.")
         return
     
+    # Before the first connection is opened, so every pooled one gets it
+    relax_sqlite_durability()
     db = SessionLocal()
     
     try:
-        clear_database()
-        create_users(db)
-        create_menu(db)
-        create_sample_orders(db)
-        create_sample_feedback(db)
+        clear_database(reset_schema="--reset-schema" in sys.argv[1:])
+        # All phases share one transaction, committed once at the end
+        with db.begin():
+            create_users(db)
+            dishes = create_menu(db)
+            create_sample_orders(db, dishes)
+            create_sample_feedback(db)
+            refresh_stats(db)
         print_summary()
     except Exception as e:
         print(f"\n❌ Error: {e}")
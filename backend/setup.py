@@ -1,10 +1,14 @@
 """
 Setup script for AI-Slice backend.
 """
+from pathlib import Path
+
 from setuptools import setup, find_packages
 
-with open("../README.md", "r", encoding="utf-8") as fh:
-    long_description = fh.read()
+# The README sits next to backend/, relative to this file rather than the
+# caller's working directory; it is absent when building from an sdist
+README = Path(__file__).resolve().parent.parent / "README.md"
+long_description = README.read_text(encoding="utf-8") if README.is_file() else ""
 
 setup(
     name="aislice",